@@ -2,11 +2,18 @@
 Base Agent class for all code review agents.
 """
 import asyncio
-import aiohttp
+import os
+import re
+import functools
+import hashlib
 from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from time import perf_counter
 from typing import List, Dict, Any, Optional
-from datetime import datetime
+from datetime import datetime, timezone
 import json
+import orjson
 from loguru import logger
 
 from langchain.prompts import ChatPromptTemplate
@@ -19,40 +26,76 @@ from src.core.config import AgentConfig, settings
 # Configure litellm to use Ollama
 litellm.drop_params = True  # Important for Ollama compatibility
 
-# Global aiohttp session
-_aiohttp_session = None
+# Connection pooling for LLM calls is handled inside litellm: its Ollama
+# route sends every async request through litellm.module_level_aclient, a
+# shared httpx client with keep-alive. (litellm.aclient_session is only
+# read by the OpenAI-compatible handlers and expects an httpx.AsyncClient,
+# so there is nothing for us to install here.)
 
-async def get_aiohttp_session():
-    global _aiohttp_session
-    if _aiohttp_session is None or _aiohttp_session.closed:
-        _aiohttp_session = aiohttp.ClientSession()
-    return _aiohttp_session
+# Bound concurrent LLM calls to what the Ollama server can serve in parallel
+# (set OLLAMA_NUM_PARALLEL / OLLAMA_MAX_LOADED_MODELS server-side to match)
+_llm_semaphore = asyncio.Semaphore(int(os.environ.get("OLLAMA_NUM_PARALLEL", 4)))
 
-async def close_aiohttp_session():
-    global _aiohttp_session
-    if _aiohttp_session and not _aiohttp_session.closed:
-        await _aiohttp_session.close()
+# Compiled once at import - response parsing runs for every LLM call
+_LINE_NUM_RE = re.compile(r'(\d+)')
+_LINE_IN_TEXT_RE = re.compile(r'line\s*(\d+)', re.IGNORECASE)
+_JSON_BLOCK_RE = re.compile(r'\{.*\}', re.DOTALL)
+_FALLBACK_RE = re.compile(r'line\s*(\d+)[^\n]*?(issue|problem)[^\n]*', re.IGNORECASE)
 
+# LRU cache of LLM responses keyed by (messages, model, temperature).
+# Re-reviews of unchanged diffs hit the cache instead of the model.
+_RESPONSE_CACHE: "OrderedDict[str, str]" = OrderedDict()
+_RESPONSE_CACHE_MAX_SIZE = 1024
+
+# Only near-deterministic sampling is safe to memoize
+_CACHEABLE_TEMPERATURE = 0.3
+
+# Unified-diff hunk header, used to scope file context to changed regions
+_HUNK_HEADER_RE = re.compile(r'@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@')
+
+# Lines of surrounding context included around each diff hunk
+_CONTEXT_MARGIN = 20
+
+# Diffs below this many lines with no pattern hits skip the LLM entirely
+_SMALL_DIFF_LINES = 20
+
+# Exponential-backoff retry policy for transient LLM failures. Lives here
+# rather than in the orchestrator because review_code swallows exceptions
+# for robustness - the retry must run below that catch-all to ever fire.
+_MAX_RETRIES = 3
+_BACKOFF_BASE_SECONDS = 1.0
+_TRANSIENT_MARKERS = ("429", "rate limit", "timeout", "overloaded", "connection")
+
+# Shared severity ranking used when sorting issues - built once so sort
+# key lambdas don't allocate a fresh dict per comparison
+SEVERITY_RANK = {"CRITICAL": 0, "HIGH": 1, "MEDIUM": 2, "LOW": 3, "INFO": 4}
+
+@dataclass(slots=True, repr=False)
 class CodeReviewIssue:
-    """Represents a single issue found during code review."""
-    
-    def __init__(
-        self,
-        line_number: int,
-        severity: str,  # CRITICAL, HIGH, MEDIUM, LOW, INFO
-        category: str,
-        message: str,
-        suggestion: Optional[str] = None,
-        file_path: Optional[str] = None
-    ):
-        self.line_number = line_number
-        self.severity = severity
-        self.category = category
-        self.message = message
-        self.suggestion = suggestion
-        self.file_path = file_path
-        self.timestamp = datetime.utcnow()
-    
+    """Represents a single issue found during code review.
+
+    slots=True avoids a per-instance __dict__; large PRs produce thousands
+    of these, so both memory and attribute access benefit.
+    """
+
+    line_number: int
+    severity: str  # CRITICAL, HIGH, MEDIUM, LOW, INFO
+    category: str
+    message: str
+    suggestion: Optional[str] = None
+    file_path: Optional[str] = None
+    timestamp: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    severity_rank: int = field(init=False)
+    _timestamp_iso: str = field(init=False)
+
+    def __post_init__(self):
+        # Computed once so downstream sorts and aggregations compare a
+        # plain int instead of doing a dict lookup per comparison
+        self.severity_rank = SEVERITY_RANK.get(self.severity, 5)
+        # Formatted once - to_dict runs for every issue on every report
+        # serialization and status poll
+        self._timestamp_iso = self.timestamp.isoformat()
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert issue to dictionary format."""
         return {
@@ -62,7 +105,7 @@ class CodeReviewIssue:
             "message": self.message,
             "suggestion": self.suggestion,
             "file_path": self.file_path,
-            "timestamp": self.timestamp.isoformat()
+            "timestamp": self._timestamp_iso
         }
     
     def __repr__(self):
@@ -70,14 +113,53 @@ class CodeReviewIssue:
 
 class BaseAgent(ABC):
     """Base class for all code review agents."""
-    
+
+    # Maximum files marshalled into one batched prompt
+    MAX_BATCH_FILES = 8
+
+    # Upper bound on file-context characters included in a prompt
+    MAX_CONTEXT_CHARS = 3000
+
+    # Terse response schema - serialized once, tokens cost latency
+    _SCHEMA_STR = json.dumps({
+        "issues": [
+            {
+                "line_number": "integer",
+                "severity": "CRITICAL|HIGH|MEDIUM|LOW|INFO",
+                "category": "category_name",
+                "message": "description of the issue",
+                "suggestion": "how to fix it (optional)"
+            }
+        ]
+    }, separators=(",", ":"))
+
     def __init__(self, config: AgentConfig):
         self.config = config
         self.name = config.name
         self.model = f"ollama/{config.model}"
         self.issues: List[CodeReviewIssue] = []
         self.execution_time: Optional[float] = None
-        logger.info(f"Initialized {self.name} with model {self.model}")
+
+        # Invariant per agent - build once instead of per LLM call. litellm
+        # does not mutate messages, so sharing the system dict is safe.
+        self._system_msg = {"role": "system", "content": config.system_prompt}
+        self._completion_kwargs = {
+            "model": self.model,
+            "temperature": config.temperature,
+            "max_tokens": config.max_tokens,
+            "timeout": settings.model_timeout,
+            "api_base": settings.ollama_base_url,
+            # Pin the model in Ollama memory so its weights and the shared
+            # system-prompt KV state stay warm across calls (drop_params
+            # strips this for providers that don't understand it)
+            "keep_alive": settings.model_keep_alive
+        }
+
+        # Specialized call site: all invariants bound once, so the hot
+        # path is a single call with just the messages
+        self._call = functools.partial(acompletion, **self._completion_kwargs)
+
+        logger.info("Initialized {name} with model {model}", name=self.name, model=self.model)
     
     async def review_code(
         self,
@@ -98,110 +180,338 @@ class BaseAgent(ABC):
         Returns:
             List of CodeReviewIssue objects
         """
-        start_time = asyncio.get_event_loop().time()
-        
+        start_time = perf_counter()
+
         try:
+            # Cheap regex pre-pass: a small diff with no pattern hits is
+            # not worth an LLM round-trip
+            pattern_hits = self._scan_patterns(code_diff, file_path)
+            if not pattern_hits and code_diff.count("\n") < _SMALL_DIFF_LINES:
+                logger.debug(f"{self.name} skipping clean diff for {file_path}")
+                self.issues = []
+                return self.issues
+
             # Prepare the review prompt
             prompt = self._prepare_prompt(code_diff, file_path, full_content, context)
-            
+
             # Get review from LLM
             response = await self._get_llm_response(prompt)
-            
+
             # Parse the response into issues
             self.issues = self._parse_response(response, file_path)
-            
+            self.issues.extend(pattern_hits)
+
             # Filter and validate issues
             self.issues = self._filter_issues(self.issues)
-            
+
         except Exception as e:
             logger.error(f"{self.name} error reviewing {file_path}: {str(e)}")
             self.issues = []
         
         finally:
-            self.execution_time = asyncio.get_event_loop().time() - start_time
-            logger.info(f"{self.name} completed review of {file_path} in {self.execution_time:.2f}s. Found {len(self.issues)} issues.")
+            self.execution_time = perf_counter() - start_time
+            # Deferred formatting: loguru only interpolates if the sink
+            # accepts INFO, so the hot path skips the string work
+            logger.info(
+                "{name} completed review of {path} in {t:.2f}s. Found {n} issues.",
+                name=self.name, path=file_path, t=self.execution_time, n=len(self.issues)
+            )
         
         return self.issues
     
-    async def _get_llm_response(self, prompt: str) -> str:
-        """Get response from the LLM."""
-        messages = [
-            {"role": "system", "content": self.config.system_prompt},
-            {"role": "user", "content": prompt}
-        ]
-        
-        try:
-            # For Ollama, we need to use the correct format
-            # Use ollama/ prefix with the model name
-            response = await acompletion(
-                model=self.model,
-                messages=messages,
-                temperature=self.config.temperature,
-                max_tokens=self.config.max_tokens,
-                timeout=settings.model_timeout,
-                api_base=settings.ollama_base_url  # Explicitly set for Ollama
-            )
-            
-            return response.choices[0].message.content
-            
-        except Exception as e:
-            logger.error(f"{self.name} LLM error: {str(e)}")
-            # Try with synchronous call as fallback
-            try:
-                response = completion(
-                    model=self.model,
-                    messages=messages,
-                    temperature=self.config.temperature,
-                    max_tokens=self.config.max_tokens,
-                    timeout=settings.model_timeout,
-                    api_base=settings.ollama_base_url
-                )
-                return response.choices[0].message.content
-            except Exception as e2:
-                logger.error(f"{self.name} Sync LLM error: {str(e2)}")
-                raise
-    
-    def _prepare_prompt(
+    async def stream_issues(
         self,
         code_diff: str,
         file_path: str,
         full_content: Optional[str] = None,
         context: Optional[Dict[str, Any]] = None
-    ) -> str:
-        """Prepare the prompt for the LLM."""
+    ):
+        """
+        Stream issues as the model generates them.
+
+        Uses stream=True and an incremental brace-balancing scan so each
+        issue object in the response's "issues" array is yielded as soon as
+        it closes, instead of waiting for the final token. Callers that need
+        filtering should collect the issues and apply _filter_issues.
+
+        Yields:
+            CodeReviewIssue objects in generation order.
+        """
+        prompt = self._prepare_prompt(code_diff, file_path, full_content, context)
+        messages = [self._system_msg, {"role": "user", "content": prompt}]
+
+        async with _llm_semaphore:
+            stream = await self._call(messages=messages, stream=True)
+
+            buffer = ""
+            scanned = 0
+            depth = 0
+            in_string = False
+            escaped = False
+            object_start = None
+
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                buffer += delta
+
+                # Scan only the new tail; depth 2 objects are issue entries
+                # inside the outer {"issues": [...]} wrapper
+                for i in range(scanned, len(buffer)):
+                    char = buffer[i]
+                    if in_string:
+                        if escaped:
+                            escaped = False
+                        elif char == "\\":
+                            escaped = True
+                        elif char == '"':
+                            in_string = False
+                        continue
+                    if char == '"':
+                        in_string = True
+                    elif char == "{":
+                        depth += 1
+                        if depth == 2 and object_start is None:
+                            object_start = i
+                    elif char == "}":
+                        depth -= 1
+                        if depth == 1 and object_start is not None:
+                            try:
+                                issue_data = json.loads(buffer[object_start:i + 1])
+                            except json.JSONDecodeError:
+                                issue_data = None
+                            object_start = None
+                            if issue_data:
+                                for issue in self._build_issues([issue_data], file_path):
+                                    yield issue
+                scanned = len(buffer)
+
+    async def review_files(self, items: List[Dict[str, Any]]) -> List[List[CodeReviewIssue]]:
+        """
+        Review multiple files concurrently.
+
+        Each item is a dict of keyword arguments for review_code. Calls are
+        fanned out with asyncio.gather; the module-level semaphore keeps the
+        number of in-flight LLM requests within the server's parallelism.
+        """
+        return await asyncio.gather(
+            *(self.review_code(**item) for item in items)
+        )
+
+    async def review_code_batch(
+        self,
+        files: List[tuple],
+        context: Optional[Dict[str, Any]] = None
+    ) -> List[List[CodeReviewIssue]]:
+        """
+        Review several files in a single LLM call.
+
+        Batching amortizes the system prompt and network round-trip across
+        files, which matters because LLM latency dominates the review path.
+
+        Args:
+            files: List of (file_path, code_diff) tuples
+            context: Additional context (PR info, related files, etc.)
+
+        Returns:
+            One list of CodeReviewIssue objects per input file, in order.
+        """
+        results: List[List[CodeReviewIssue]] = []
+
+        # Keep batches small so the model's output doesn't get truncated
+        for offset in range(0, len(files), self.MAX_BATCH_FILES):
+            batch = files[offset:offset + self.MAX_BATCH_FILES]
+
+            try:
+                prompt = self._prepare_batch_prompt(batch)
+                response = await self._get_llm_response(prompt)
+                parsed = self._parse_batch_response(response, batch)
+            except Exception as e:
+                logger.error(f"{self.name} error reviewing batch of {len(batch)} files: {str(e)}")
+                parsed = [[] for _ in batch]
+
+            results.extend(self._filter_issues(issues) if issues else [] for issues in parsed)
+
+        return results
+
+    def _prepare_batch_prompt(self, files: List[tuple]) -> str:
+        """Prepare a single prompt covering multiple file diffs."""
         prompt_parts = [
-            f"Review the following code changes in {file_path}:",
-            "",
-            "=== CODE DIFF ===",
-            code_diff,
+            f"Review the code changes in the following {len(files)} samples:",
             ""
         ]
-        
-        if full_content:
+
+        for index, (file_path, code_diff) in enumerate(files):
             prompt_parts.extend([
-                "=== FULL FILE CONTENT ===",
-                full_content[:3000],  # Limit to prevent token overflow
+                f"=== SAMPLE {index}: {file_path} ===",
+                code_diff,
                 ""
             ])
-        
+
         prompt_parts.extend([
-            "Provide your review in the following JSON format:",
+            "Provide your review in the following JSON format, one entry per sample:",
             json.dumps({
-                "issues": [
+                "results": [
                     {
-                        "line_number": "integer",
-                        "severity": "CRITICAL|HIGH|MEDIUM|LOW|INFO",
-                        "category": "category_name",
-                        "message": "description of the issue",
-                        "suggestion": "how to fix it (optional)"
+                        "index": "sample number",
+                        "issues": [
+                            {
+                                "line_number": "integer",
+                                "severity": "CRITICAL|HIGH|MEDIUM|LOW|INFO",
+                                "category": "category_name",
+                                "message": "description of the issue",
+                                "suggestion": "how to fix it (optional)"
+                            }
+                        ]
                     }
                 ]
             }, indent=2),
             "",
             "Focus on issues relevant to your expertise. Return only valid JSON."
         ])
-        
+
         return "\n".join(prompt_parts)
+
+    def _parse_batch_response(self, response: str, files: List[tuple]) -> List[List[CodeReviewIssue]]:
+        """Parse a batched LLM response back into per-file issue lists."""
+        per_file: List[List[CodeReviewIssue]] = [[] for _ in files]
+
+        try:
+            match = _JSON_BLOCK_RE.search(response)
+            if match:
+                data = orjson.loads(match.group())
+
+                for entry in data.get("results", []):
+                    index_str = str(entry.get("index", ""))
+                    if not index_str.isdigit():
+                        continue
+                    index = int(index_str)
+                    if index >= len(files):
+                        continue
+
+                    file_path = files[index][0]
+                    per_file[index] = self._build_issues(entry.get("issues", []), file_path)
+
+        except orjson.JSONDecodeError as e:
+            logger.warning(f"{self.name} failed to parse batch JSON response: {e}")
+
+        return per_file
+
+    async def _get_llm_response(self, prompt: str) -> str:
+        """Get response from the LLM."""
+        messages = [self._system_msg, {"role": "user", "content": prompt}]
+
+        cache_key = None
+        if self.config.temperature < _CACHEABLE_TEMPERATURE:
+            cache_key = hashlib.blake2b(
+                json.dumps(messages, sort_keys=True).encode()
+                + self.model.encode()
+                + str(self.config.temperature).encode()
+            ).hexdigest()
+
+            cached = _RESPONSE_CACHE.get(cache_key)
+            if cached is not None:
+                _RESPONSE_CACHE.move_to_end(cache_key)
+                logger.debug(f"{self.name} LLM cache hit")
+                return cached
+
+        # Retry transient failures (429s, timeouts) with exponential
+        # backoff before giving up; anything else falls through to the
+        # sync fallback immediately
+        delay = _BACKOFF_BASE_SECONDS
+        for attempt in range(_MAX_RETRIES):
+            try:
+                # For Ollama, we need to use the correct format
+                # Use ollama/ prefix with the model name
+                async with _llm_semaphore:
+                    response = await self._call(messages=messages)
+
+                content = response.choices[0].message.content
+                if cache_key is not None:
+                    _RESPONSE_CACHE[cache_key] = content
+                    if len(_RESPONSE_CACHE) > _RESPONSE_CACHE_MAX_SIZE:
+                        _RESPONSE_CACHE.popitem(last=False)
+                return content
+
+            except Exception as e:
+                message = str(e).lower()
+                transient = any(marker in message for marker in _TRANSIENT_MARKERS)
+                if transient and attempt < _MAX_RETRIES - 1:
+                    logger.warning(
+                        f"{self.name} transient LLM error "
+                        f"(attempt {attempt + 1}/{_MAX_RETRIES}): {e}"
+                    )
+                    await asyncio.sleep(delay)
+                    delay *= 2
+                    continue
+
+                logger.error("{name} LLM error: {err}", name=self.name, err=str(e))
+                break
+
+        # Try with synchronous call as fallback, in a worker thread so
+        # the event loop keeps serving the other concurrent agents
+        try:
+            response = await asyncio.to_thread(
+                completion,
+                messages=messages,
+                **self._completion_kwargs
+            )
+            return response.choices[0].message.content
+        except Exception as e2:
+            logger.error(f"{self.name} Sync LLM error: {str(e2)}")
+            raise
+    
+    def _prepare_prompt(
+        self,
+        code_diff: str,
+        file_path: str,
+        full_content: Optional[str] = None,
+        context: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Prepare the prompt for the LLM."""
+        # Single fused f-string - no intermediate list or per-call joins
+        ctx_block = (
+            f"=== FILE CONTEXT (around changes) ===\n"
+            f"{self._context_window(full_content, code_diff)}\n\n"
+        ) if full_content else ""
+
+        return (
+            f"Review the following code changes in {file_path}:\n"
+            f"\n"
+            f"=== CODE DIFF ===\n"
+            f"{code_diff}\n"
+            f"\n"
+            f"{ctx_block}"
+            f"Provide your review in the following JSON format:\n"
+            f"{self._SCHEMA_STR}\n"
+            f"\n"
+            f"Focus on issues relevant to your expertise. Return only valid JSON."
+        )
+
+    @classmethod
+    def _context_window(cls, full_content: str, code_diff: str) -> str:
+        """Slice file content down to the regions the diff actually touches.
+
+        Prompt tokens cost latency roughly linearly, so instead of shipping
+        the first 3000 characters of the file we parse the @@ hunk headers
+        and include only the referenced line ranges plus a margin.
+        """
+        hunks = _HUNK_HEADER_RE.findall(code_diff)
+        if not hunks:
+            return full_content[:cls.MAX_CONTEXT_CHARS]
+
+        lines = full_content.split("\n")
+        keep = set()
+        for start_str, count_str in hunks:
+            start = int(start_str)
+            count = int(count_str) if count_str else 1
+            low = max(0, start - 1 - _CONTEXT_MARGIN)
+            high = min(len(lines), start - 1 + count + _CONTEXT_MARGIN)
+            keep.update(range(low, high))
+
+        snippet = "\n".join(lines[i] for i in sorted(keep))
+        return snippet[:cls.MAX_CONTEXT_CHARS]
     
     def _parse_response(self, response: str, file_path: str) -> List[CodeReviewIssue]:
         """Parse LLM response into CodeReviewIssue objects."""
@@ -209,64 +519,87 @@ class BaseAgent(ABC):
         
         try:
             # Extract JSON from response
-            json_start = response.find("{")
-            json_end = response.rfind("}") + 1
-            if json_start >= 0 and json_end > json_start:
-                json_str = response[json_start:json_end]
-                data = json.loads(json_str)
-                
-                for issue_data in data.get("issues", []):
-                    # Handle different line number formats
-                    line_num_str = str(issue_data.get("line_number", 0))
-                    
-                    # Extract first number if it's a range or list
-                    import re
-                    line_match = re.search(r'(\d+)', line_num_str)
-                    line_number = int(line_match.group(1)) if line_match else 0
-                    
-                    issue = CodeReviewIssue(
-                        line_number=line_number,
-                        severity=issue_data.get("severity", "MEDIUM"),
-                        category=issue_data.get("category", "general"),
-                        message=issue_data.get("message", ""),
-                        suggestion=issue_data.get("suggestion"),
-                        file_path=file_path
-                    )
-                    issues.append(issue)
-        
-        except json.JSONDecodeError as e:
+            match = _JSON_BLOCK_RE.search(response)
+            if match:
+                data = orjson.loads(match.group())
+                issues = self._build_issues(data.get("issues", []), file_path)
+
+        except orjson.JSONDecodeError as e:
             logger.warning(f"{self.name} failed to parse JSON response: {e}")
             # Fallback: try to extract issues from text
             issues = self._parse_text_response(response, file_path)
         
         except Exception as e:
             logger.error(f"{self.name} error parsing response: {e}")
-        
+
         return issues
-    
+
+    def _build_issues(self, issues_data: List[Dict[str, Any]], file_path: str) -> List[CodeReviewIssue]:
+        """Construct CodeReviewIssue objects from parsed JSON entries."""
+        issues = []
+
+        for issue_data in issues_data:
+            # Handle different line number formats
+            line_num_str = str(issue_data.get("line_number", 0))
+
+            # Extract first number if it's a range or list
+            line_match = _LINE_NUM_RE.search(line_num_str)
+            line_number = int(line_match.group(1)) if line_match else 0
+
+            issues.append(CodeReviewIssue(
+                line_number=line_number,
+                severity=issue_data.get("severity", "MEDIUM"),
+                category=issue_data.get("category", "general"),
+                message=issue_data.get("message", ""),
+                suggestion=issue_data.get("suggestion"),
+                file_path=file_path
+            ))
+
+        return issues
+
     def _parse_text_response(self, response: str, file_path: str) -> List[CodeReviewIssue]:
         """Fallback parser for non-JSON responses."""
-        # This is a simple implementation - can be enhanced
+        # Single compiled-regex pass over the whole response; avoids the
+        # per-line split and repeated .lower() copies
+        return [
+            CodeReviewIssue(
+                line_number=int(match.group(1)),
+                severity="MEDIUM",
+                category="general",
+                message=match.group(0).strip(),
+                file_path=file_path
+            )
+            for match in _FALLBACK_RE.finditer(response)
+        ]
+    
+    def _scan_patterns(self, code_diff: str, file_path: str) -> List[CodeReviewIssue]:
+        """Cheap regex pre-pass over the diff. Subclasses with pattern tables
+        override this; the default finds nothing."""
+        return []
+
+    def _scan_pattern_table(
+        self,
+        table: Dict[str, List[tuple]],
+        code_diff: str,
+        file_path: str
+    ) -> List[CodeReviewIssue]:
+        """Run a compiled {category: [(pattern, severity, message)]} table
+        over the diff and return one issue per match."""
         issues = []
-        lines = response.split("\n")
-        
-        for line in lines:
-            if "line" in line.lower() and ("issue" in line.lower() or "problem" in line.lower()):
-                # Try to extract line number
-                import re
-                line_match = re.search(r'line\s*(\d+)', line, re.IGNORECASE)
-                line_num = int(line_match.group(1)) if line_match else 0
-                
-                issues.append(CodeReviewIssue(
-                    line_number=line_num,
-                    severity="MEDIUM",
-                    category="general",
-                    message=line.strip(),
-                    file_path=file_path
-                ))
-        
+
+        for category, patterns in table.items():
+            for pattern, severity, message in patterns:
+                for match in pattern.finditer(code_diff):
+                    issues.append(CodeReviewIssue(
+                        line_number=code_diff.count("\n", 0, match.start()) + 1,
+                        severity=severity,
+                        category=category,
+                        message=message,
+                        file_path=file_path
+                    ))
+
         return issues
-    
+
     @abstractmethod
     def _filter_issues(self, issues: List[CodeReviewIssue]) -> List[CodeReviewIssue]:
         """Filter issues based on agent-specific criteria. Must be implemented by subclasses."""
@@ -274,14 +607,17 @@ class BaseAgent(ABC):
     
     def get_summary(self) -> Dict[str, Any]:
         """Get summary of the review."""
-        severity_counts = {}
+        # Single pass: severity counts and categories together
+        severity_counts: Counter = Counter()
+        categories = set()
         for issue in self.issues:
-            severity_counts[issue.severity] = severity_counts.get(issue.severity, 0) + 1
-        
+            severity_counts[issue.severity] += 1
+            categories.add(issue.category)
+
         return {
             "agent": self.name,
             "total_issues": len(self.issues),
-            "severity_breakdown": severity_counts,
+            "severity_breakdown": dict(severity_counts),
             "execution_time": self.execution_time,
-            "categories": list(set(issue.category for issue in self.issues))
+            "categories": list(categories)
         }
\ No newline at end of file
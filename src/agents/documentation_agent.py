@@ -1,6 +1,7 @@
 """
 Documentation Agent - Evaluates code documentation quality and completeness.
 """
+from operator import attrgetter
 from typing import List, Dict, Any, Optional
 import re
 import json
@@ -21,24 +22,28 @@ except ImportError:
 class DocumentationAgent(BaseAgent):
     """Agent specialized in documentation quality and completeness."""
     
-    # Documentation patterns to check
+    # Documentation patterns to check (compiled once at class definition)
     DOC_PATTERNS = {
         "missing_docstring": [
-            (r'def\s+\w+\([^)]*\):\s*\n\s*[^"\']', "HIGH", "Function missing docstring"),
-            (r'class\s+\w+.*:\s*\n\s*[^"\']', "HIGH", "Class missing docstring"),
+            (re.compile(r'def\s+\w+\([^)]*\):\s*\n\s*[^"\']'), "HIGH", "Function missing docstring"),
+            (re.compile(r'class\s+\w+.*:\s*\n\s*[^"\']'), "HIGH", "Class missing docstring"),
         ],
         "incomplete_docs": [
-            (r'"""[^"]{0,20}"""', "MEDIUM", "Docstring too short - add more detail"),
-            (r'#\s*TODO(?!.*\d{4})', "LOW", "TODO without deadline or assignee"),
+            (re.compile(r'"""[^"]{0,20}"""'), "MEDIUM", "Docstring too short - add more detail"),
+            (re.compile(r'#\s*TODO(?!.*\d{4})'), "LOW", "TODO without deadline or assignee"),
         ],
         "missing_type_hints": [
-            (r'def\s+\w+\([^:)]+\)(?!.*->)', "MEDIUM", "Function missing return type hint"),
+            (re.compile(r'def\s+\w+\([^:)]+\)(?!.*->)'), "MEDIUM", "Function missing return type hint"),
         ],
     }
     
     def __init__(self):
         super().__init__(AGENT_CONFIGS["documentation"])
         
+    def _scan_patterns(self, code_diff: str, file_path: str) -> List[CodeReviewIssue]:
+        """Pre-scan the diff with the compiled documentation pattern table."""
+        return self._scan_pattern_table(self.DOC_PATTERNS, code_diff, file_path)
+
     def _filter_issues(self, issues: List[CodeReviewIssue]) -> List[CodeReviewIssue]:
         """Filter and prioritize documentation issues."""
         # Group similar issues
@@ -57,11 +62,8 @@ class DocumentationAgent(BaseAgent):
             
             unique_issues.append(issue)
         
-        # Sort by severity and line number
-        unique_issues.sort(key=lambda x: (
-            {"CRITICAL": 0, "HIGH": 1, "MEDIUM": 2, "LOW": 3, "INFO": 4}.get(x.severity, 5),
-            x.line_number
-        ))
+        # Sort by severity and line number (rank precomputed at construction)
+        unique_issues.sort(key=attrgetter("severity_rank", "line_number"))
         
         return unique_issues[:15]  # Limit to top 15 documentation issues
     
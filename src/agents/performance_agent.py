@@ -1,6 +1,7 @@
 """
 Performance Agent - Analyzes code for performance issues and optimization opportunities.
 """
+from operator import attrgetter
 from typing import List, Dict, Any, Optional
 import re
 import json
@@ -21,21 +22,21 @@ except ImportError:
 class PerformanceAgent(BaseAgent):
     """Agent specialized in detecting performance issues and optimization opportunities."""
     
-    # Common performance anti-patterns
+    # Common performance anti-patterns (compiled once at class definition)
     PERFORMANCE_PATTERNS = {
         "n_plus_one": [
-            (r'for.*in.*:\s*\n.*\.(get|select|find|query)', "HIGH", "Potential N+1 query pattern"),
+            (re.compile(r'for.*in.*:\s*\n.*\.(get|select|find|query)'), "HIGH", "Potential N+1 query pattern"),
         ],
         "inefficient_loops": [
-            (r'for.*in.*:\s*\n\s*for.*in', "MEDIUM", "Nested loops detected - check time complexity"),
+            (re.compile(r'for.*in.*:\s*\n\s*for.*in'), "MEDIUM", "Nested loops detected - check time complexity"),
         ],
         "memory_issues": [
-            (r'(\+=|\+\s*=).*loop', "MEDIUM", "String concatenation in loop - use list.append() and join()"),
-            (r'list\s*\(.*\).*list\s*\(', "LOW", "Multiple list conversions may impact memory"),
+            (re.compile(r'(\+=|\+\s*=).*loop'), "MEDIUM", "String concatenation in loop - use list.append() and join()"),
+            (re.compile(r'list\s*\(.*\).*list\s*\('), "LOW", "Multiple list conversions may impact memory"),
         ],
         "database": [
-            (r'SELECT\s+\*', "MEDIUM", "Avoid SELECT * - specify needed columns"),
-            (r'(get|filter|query).*loop', "HIGH", "Database query inside loop detected"),
+            (re.compile(r'SELECT\s+\*'), "MEDIUM", "Avoid SELECT * - specify needed columns"),
+            (re.compile(r'(get|filter|query).*loop'), "HIGH", "Database query inside loop detected"),
         ],
     }
     
@@ -47,21 +48,20 @@ class PerformanceAgent(BaseAgent):
             "critical": ["O(n²)", "O(n³)", "O(2ⁿ)"]
         }
     
+    def _scan_patterns(self, code_diff: str, file_path: str) -> List[CodeReviewIssue]:
+        """Pre-scan the diff with the compiled anti-pattern table."""
+        return self._scan_pattern_table(self.PERFORMANCE_PATTERNS, code_diff, file_path)
+
     def _filter_issues(self, issues: List[CodeReviewIssue]) -> List[CodeReviewIssue]:
         """Filter and prioritize performance issues."""
-        # Remove duplicates
-        unique_issues = []
-        seen = set()
-        
+        # Remove duplicates - order-preserving dedup done by the dict itself
+        seen_map = {}
         for issue in issues:
-            key = (issue.line_number, issue.category, issue.message[:30])
-            if key not in seen:
-                seen.add(key)
-                unique_issues.append(issue)
+            seen_map.setdefault((issue.line_number, issue.category, issue.message[:30]), issue)
+        unique_issues = list(seen_map.values())
         
-        # Sort by severity
-        severity_order = {"CRITICAL": 0, "HIGH": 1, "MEDIUM": 2, "LOW": 3, "INFO": 4}
-        unique_issues.sort(key=lambda x: severity_order.get(x.severity, 5))
+        # Sort by severity (rank precomputed at issue construction)
+        unique_issues.sort(key=attrgetter("severity_rank"))
         
         return unique_issues[:15]  # Limit to top 15 performance issues
     
@@ -1,93 +1,159 @@
 """
 Security Agent - Detects security vulnerabilities in code.
 """
+import bisect
+import heapq
 import json
+from operator import attrgetter
 from typing import List, Dict, Any, Optional
 import re
 from loguru import logger
 from src.agents.base_agent import BaseAgent, CodeReviewIssue
 from src.core.config import AGENT_CONFIGS
 
+# Secret patterns fused into a single alternation so the content is scanned
+# once instead of once per pattern; the matched group name indexes the
+# severity/message side table. Quoted values exclude newlines so matches
+# cannot span lines when scanning whole files.
+_SECRET_ENTRIES = [
+    ("password", r'(?:password|passwd|pwd)\s*=\s*["\'][^"\'\n]+["\']', "CRITICAL", "Hardcoded password detected"),
+    ("api_key", r'(?:api_key|apikey|api_token)\s*=\s*["\'][^"\'\n]+["\']', "CRITICAL", "Hardcoded API key detected"),
+    ("generic_secret", r'(?:secret|private_key)\s*=\s*["\'][^"\'\n]+["\']', "CRITICAL", "Hardcoded secret detected"),
+    ("aws_credentials", r'(?:aws_access_key|aws_secret)\s*=\s*["\'][^"\'\n]+["\']', "CRITICAL", "AWS credentials detected"),
+]
+_SECRETS_RE = re.compile(
+    "|".join(f"(?P<{name}>{pattern})" for name, pattern, _, _ in _SECRET_ENTRIES),
+    re.IGNORECASE,
+)
+_SECRET_INFO = {name: (severity, message) for name, _, severity, message in _SECRET_ENTRIES}
+
+# Required literal substrings per pattern category. Each regex above only
+# matches when one of these keywords is present, so a cheap lowercase
+# substring check prunes most lines before any regex engine runs.
+_CATEGORY_LITERALS = {
+    "sql_injection": ("select", "where"),
+    "xss": ("innerhtml", "document.write", ".html("),
+    "secrets": ("passw", "pwd", "api", "secret", "private_key", "aws_"),
+    "insecure_functions": ("eval", "exec", "pickle", "yaml"),
+    "path_traversal": ("open", "os.path.join"),
+    "weak_crypto": ("md5", "sha1", "random"),
+}
+_SECRET_LITERALS = _CATEGORY_LITERALS["secrets"]
+
+# Placeholder tokens that mark a matched "secret" as a dummy value; one
+# compiled alternation checks them all in a single pass over the line.
+_PLACEHOLDERS = ('example', 'placeholder', 'your_', 'xxx', '...')
+_PLACEHOLDER_RE = re.compile('|'.join(map(re.escape, _PLACEHOLDERS)))
+
+# Paths that never contain interesting secrets but dominate scan time:
+# lockfiles, minified bundles, vendored/generated trees.
+_SKIP_PATHS = re.compile(
+    r'(^|/)(node_modules|vendor|dist|build)/'
+    r'|\.min\.(js|css)$'
+    r'|(yarn|poetry|Pipfile|composer)\.lock$'
+    r'|package-lock\.json$'
+    r'|pnpm-lock\.yaml$'
+    r'|\.(pb\.go|pb2\.py)$',
+    re.IGNORECASE,
+)
+
+# Response schema serialized once; the prompt body re-uses the same string
+# on every call instead of re-running json.dumps.
+_SECURITY_SCHEMA_JSON = json.dumps({
+    "issues": [
+        {
+            "line_number": "line number where issue occurs",
+            "severity": "CRITICAL for immediate threats, HIGH for serious issues, MEDIUM for concerning patterns, LOW for best practice violations",
+            "category": "sql_injection|xss|auth|secrets|crypto|path_traversal|injection|other",
+            "message": "clear description of the security issue",
+            "suggestion": "specific fix or mitigation"
+        }
+    ]
+}, indent=2)
+
+
 class SecurityAgent(BaseAgent):
     """Agent specialized in detecting security vulnerabilities."""
     
-    # Common security patterns to look for
+    # Common security patterns to look for (compiled once at class
+    # definition - the scan path tests them against every line)
     SECURITY_PATTERNS = {
         # SQL Injection patterns
         "sql_injection": [
-            (r'f["\'].*SELECT.*WHERE.*{.*}', "CRITICAL", "Potential SQL injection via f-string"),
-            (r'\".*SELECT.*WHERE.*\"\s*\+\s*', "CRITICAL", "Potential SQL injection via string concatenation"),
-            (r'\.format\(.*\).*WHERE', "HIGH", "Potential SQL injection via .format()"),
-            (r'%\s*\(.*\).*WHERE', "HIGH", "Potential SQL injection via % formatting"),
+            (re.compile(r'f["\'].*SELECT.*WHERE.*{.*}', re.IGNORECASE), "CRITICAL", "Potential SQL injection via f-string"),
+            (re.compile(r'\".*SELECT.*WHERE.*\"\s*\+\s*', re.IGNORECASE), "CRITICAL", "Potential SQL injection via string concatenation"),
+            (re.compile(r'\.format\(.*\).*WHERE', re.IGNORECASE), "HIGH", "Potential SQL injection via .format()"),
+            (re.compile(r'%\s*\(.*\).*WHERE', re.IGNORECASE), "HIGH", "Potential SQL injection via % formatting"),
         ],
-        
+
         # XSS patterns
         "xss": [
-            (r'innerHTML\s*=\s*[^\'\"]*\+', "HIGH", "Potential XSS via innerHTML manipulation"),
-            (r'document\.write\s*\([^\'\"]*\+', "HIGH", "Potential XSS via document.write"),
-            (r'\.html\(\s*[^\'\"]*\+', "MEDIUM", "Potential XSS via jQuery .html()"),
+            (re.compile(r'innerHTML\s*=\s*[^\'\"]*\+', re.IGNORECASE), "HIGH", "Potential XSS via innerHTML manipulation"),
+            (re.compile(r'document\.write\s*\([^\'\"]*\+', re.IGNORECASE), "HIGH", "Potential XSS via document.write"),
+            (re.compile(r'\.html\(\s*[^\'\"]*\+', re.IGNORECASE), "MEDIUM", "Potential XSS via jQuery .html()"),
         ],
-        
+
         # Hardcoded secrets
         "secrets": [
-            (r'(password|passwd|pwd)\s*=\s*["\'][^"\']+["\']', "CRITICAL", "Hardcoded password detected"),
-            (r'(api_key|apikey|api_token)\s*=\s*["\'][^"\']+["\']', "CRITICAL", "Hardcoded API key detected"),
-            (r'(secret|private_key)\s*=\s*["\'][^"\']+["\']', "CRITICAL", "Hardcoded secret detected"),
-            (r'(aws_access_key|aws_secret)\s*=\s*["\'][^"\']+["\']', "CRITICAL", "AWS credentials detected"),
+            (re.compile(r'(password|passwd|pwd)\s*=\s*["\'][^"\']+["\']', re.IGNORECASE), "CRITICAL", "Hardcoded password detected"),
+            (re.compile(r'(api_key|apikey|api_token)\s*=\s*["\'][^"\']+["\']', re.IGNORECASE), "CRITICAL", "Hardcoded API key detected"),
+            (re.compile(r'(secret|private_key)\s*=\s*["\'][^"\']+["\']', re.IGNORECASE), "CRITICAL", "Hardcoded secret detected"),
+            (re.compile(r'(aws_access_key|aws_secret)\s*=\s*["\'][^"\']+["\']', re.IGNORECASE), "CRITICAL", "AWS credentials detected"),
         ],
-        
+
         # Insecure functions
         "insecure_functions": [
-            (r'eval\s*\(', "HIGH", "Use of eval() is dangerous"),
-            (r'exec\s*\(', "HIGH", "Use of exec() is dangerous"),
-            (r'pickle\.loads\s*\(', "HIGH", "Unpickling untrusted data is dangerous"),
-            (r'yaml\.load\s*\([^,)]*\)', "MEDIUM", "Use yaml.safe_load() instead of yaml.load()"),
+            (re.compile(r'eval\s*\(', re.IGNORECASE), "HIGH", "Use of eval() is dangerous"),
+            (re.compile(r'exec\s*\(', re.IGNORECASE), "HIGH", "Use of exec() is dangerous"),
+            (re.compile(r'pickle\.loads\s*\(', re.IGNORECASE), "HIGH", "Unpickling untrusted data is dangerous"),
+            (re.compile(r'yaml\.load\s*\([^,)]*\)', re.IGNORECASE), "MEDIUM", "Use yaml.safe_load() instead of yaml.load()"),
         ],
-        
+
         # Path traversal
         "path_traversal": [
-            (r'open\s*\([^,)]*\+[^,)]*\)', "HIGH", "Potential path traversal vulnerability"),
-            (r'os\.path\.join\s*\([^,)]*request', "HIGH", "Potential path traversal via user input"),
+            (re.compile(r'open\s*\([^,)]*\+[^,)]*\)', re.IGNORECASE), "HIGH", "Potential path traversal vulnerability"),
+            (re.compile(r'os\.path\.join\s*\([^,)]*request', re.IGNORECASE), "HIGH", "Potential path traversal via user input"),
         ],
-        
+
         # Weak cryptography
         "weak_crypto": [
-            (r'md5\s*\(', "MEDIUM", "MD5 is cryptographically weak"),
-            (r'sha1\s*\(', "MEDIUM", "SHA1 is cryptographically weak"),
-            (r'Random\s*\(\)', "LOW", "Use secrets module for cryptographic randomness"),
+            (re.compile(r'md5\s*\(', re.IGNORECASE), "MEDIUM", "MD5 is cryptographically weak"),
+            (re.compile(r'sha1\s*\(', re.IGNORECASE), "MEDIUM", "SHA1 is cryptographically weak"),
+            (re.compile(r'Random\s*\(\)', re.IGNORECASE), "LOW", "Use secrets module for cryptographic randomness"),
         ],
     }
     
     def __init__(self):
         super().__init__(AGENT_CONFIGS["security"])
-        self.severity_priority = {
-            "CRITICAL": 0,
-            "HIGH": 1,
-            "MEDIUM": 2,
-            "LOW": 3,
-            "INFO": 4
+
+    def _scan_patterns(self, code_diff: str, file_path: str) -> List[CodeReviewIssue]:
+        """Pre-scan the diff, skipping categories whose keywords are absent."""
+        diff_lower = code_diff.lower()
+        candidates = {
+            category: patterns
+            for category, patterns in self.SECURITY_PATTERNS.items()
+            if any(literal in diff_lower for literal in _CATEGORY_LITERALS[category])
         }
-    
+        if not candidates:
+            return []
+        return self._scan_pattern_table(candidates, code_diff, file_path)
+
     def _filter_issues(self, issues: List[CodeReviewIssue]) -> List[CodeReviewIssue]:
         """Filter and prioritize security issues."""
-        # Remove duplicates
-        unique_issues = []
-        seen = set()
-        
+        if not issues:
+            return []
+
+        # Remove duplicates - order-preserving dedup done by the dict itself
+        seen_map = {}
         for issue in issues:
-            key = (issue.line_number, issue.message)
-            if key not in seen:
-                seen.add(key)
-                unique_issues.append(issue)
-        
-        # Sort by severity
-        unique_issues.sort(key=lambda x: self.severity_priority.get(x.severity, 5))
-        
+            seen_map.setdefault((issue.line_number, issue.message), issue)
+        unique_issues = list(seen_map.values())
+
         # Apply additional pattern-based detection
-        pattern_issues = self._detect_pattern_issues(issues[0].file_path if issues else "")
-        unique_issues.extend(pattern_issues)
-        
-        return unique_issues[:20]  # Limit to top 20 issues
+        unique_issues.extend(self._detect_pattern_issues(issues[0].file_path))
+
+        # Top 20 by severity; nsmallest avoids sorting the whole list
+        return heapq.nsmallest(20, unique_issues, key=attrgetter("severity_rank"))
     
     def _detect_pattern_issues(self, file_path: str) -> List[CodeReviewIssue]:
         """Detect issues using predefined patterns."""
@@ -105,73 +171,73 @@ class SecurityAgent(BaseAgent):
         context: Optional[Dict[str, Any]] = None
     ) -> str:
         """Prepare security-focused prompt."""
-        prompt_parts = [
-            f"As a security expert, review the following code changes in {file_path}:",
-            "",
-            "Focus on these security concerns:",
-            "1. SQL Injection vulnerabilities",
-            "2. Cross-Site Scripting (XSS)",
-            "3. Authentication and authorization issues",
-            "4. Hardcoded secrets or credentials",
-            "5. Insecure cryptography",
-            "6. Path traversal vulnerabilities",
-            "7. Code injection risks",
-            "8. OWASP Top 10 vulnerabilities",
-            "",
-            "=== CODE DIFF ===",
-            code_diff,
-            ""
-        ]
-        
-        if full_content:
-            prompt_parts.extend([
-                "=== FULL FILE CONTENT (truncated) ===",
-                full_content[:2000],
-                ""
-            ])
-        
-        prompt_parts.extend([
-            "Provide your security review in the following JSON format:",
-            json.dumps({
-                "issues": [
-                    {
-                        "line_number": "line number where issue occurs",
-                        "severity": "CRITICAL for immediate threats, HIGH for serious issues, MEDIUM for concerning patterns, LOW for best practice violations",
-                        "category": "sql_injection|xss|auth|secrets|crypto|path_traversal|injection|other",
-                        "message": "clear description of the security issue",
-                        "suggestion": "specific fix or mitigation"
-                    }
-                ]
-            }, indent=2),
-            "",
-            "Only report actual security issues, not style or performance concerns.",
+        content_block = (
+            f"=== FULL FILE CONTENT (truncated) ===\n{full_content[:2000]}\n\n"
+            if full_content else ""
+        )
+
+        return (
+            f"As a security expert, review the following code changes in {file_path}:\n"
+            "\n"
+            "Focus on these security concerns:\n"
+            "1. SQL Injection vulnerabilities\n"
+            "2. Cross-Site Scripting (XSS)\n"
+            "3. Authentication and authorization issues\n"
+            "4. Hardcoded secrets or credentials\n"
+            "5. Insecure cryptography\n"
+            "6. Path traversal vulnerabilities\n"
+            "7. Code injection risks\n"
+            "8. OWASP Top 10 vulnerabilities\n"
+            "\n"
+            f"=== CODE DIFF ===\n{code_diff}\n\n"
+            f"{content_block}"
+            "Provide your security review in the following JSON format:\n"
+            f"{_SECURITY_SCHEMA_JSON}\n"
+            "\n"
+            "Only report actual security issues, not style or performance concerns.\n"
             "Return only valid JSON without any additional text."
-        ])
-        
-        return "\n".join(prompt_parts)
+        )
     
-    async def analyze_file_for_secrets(self, content: str) -> List[CodeReviewIssue]:
+    async def analyze_file_for_secrets(self, content: str, file_path: str = "scan") -> List[CodeReviewIssue]:
         """Special method to scan entire file for secrets."""
+        # Lockfiles, minified and vendored files are huge and never
+        # hold real secrets - skip them before touching the content
+        if _SKIP_PATHS.search(file_path):
+            return []
+
+        content_lower = content.lower()
+        if not any(literal in content_lower for literal in _SECRET_LITERALS):
+            return []
+
+        # Offsets of every newline, built in one scan; bisect maps a
+        # match position back to its 1-based line number
+        newline_offsets = []
+        pos = content.find('\n')
+        while pos != -1:
+            newline_offsets.append(pos)
+            pos = content.find('\n', pos + 1)
+
         issues = []
-        lines = content.split('\n')
-        
-        for line_num, line in enumerate(lines, 1):
-            for category, patterns in self.SECURITY_PATTERNS.items():
-                if category == "secrets":
-                    for pattern, severity, message in patterns:
-                        if re.search(pattern, line, re.IGNORECASE):
-                            # Verify it's not a placeholder
-                            if not any(placeholder in line.lower() for placeholder in 
-                                     ['example', 'placeholder', 'your_', 'xxx', '...']):
-                                issues.append(CodeReviewIssue(
-                                    line_number=line_num,
-                                    severity=severity,
-                                    category="secrets",
-                                    message=message,
-                                    suggestion="Remove hardcoded secrets and use environment variables",
-                                    file_path="scan"
-                                ))
-        
+        for match in _SECRETS_RE.finditer(content):
+            line_idx = bisect.bisect_right(newline_offsets, match.start())
+            line_start = newline_offsets[line_idx - 1] + 1 if line_idx else 0
+            line_end = newline_offsets[line_idx] if line_idx < len(newline_offsets) else len(content)
+            line_lower = content_lower[line_start:line_end]
+
+            # Verify it's not a placeholder
+            if _PLACEHOLDER_RE.search(line_lower):
+                continue
+
+            severity, message = _SECRET_INFO[match.lastgroup]
+            issues.append(CodeReviewIssue(
+                line_number=line_idx + 1,
+                severity=severity,
+                category="secrets",
+                message=message,
+                suggestion="Remove hardcoded secrets and use environment variables",
+                file_path=file_path
+            ))
+
         return issues
 
 
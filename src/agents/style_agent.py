@@ -1,7 +1,10 @@
 """
 Style Agent - Ensures code follows style guidelines and best practices.
 """
+from operator import attrgetter
 from typing import List, Dict, Any, Optional
+import heapq
+import os
 import re
 import json
 from loguru import logger
@@ -18,26 +21,54 @@ except ImportError:
     from src.core.config import AGENT_CONFIGS
 
 
+# File extension → language for prompt tailoring; constant-time lookup
+# instead of chained endswith checks, and easy to extend.
+_EXT_TO_LANG = {
+    ".py": "python",
+    ".js": "javascript",
+    ".jsx": "javascript",
+    ".ts": "typescript",
+    ".tsx": "typescript",
+    ".go": "go",
+    ".java": "java",
+    ".rb": "ruby",
+    ".rs": "rust",
+}
+
+# Response schema serialized once at import rather than per prompt build.
+_STYLE_SCHEMA_JSON = json.dumps({
+    "issues": [
+        {
+            "line_number": "line where style issue occurs",
+            "severity": "HIGH for major violations, MEDIUM for standard issues, LOW for suggestions",
+            "category": "naming|formatting|structure|documentation|consistency|complexity",
+            "message": "description of the style issue",
+            "suggestion": "how to improve the style"
+        }
+    ]
+}, indent=2)
+
+
 class StyleAgent(BaseAgent):
     """Agent specialized in code style and readability."""
     
-    # Language-specific style guidelines
+    # Language-specific style guidelines (compiled once at class definition)
     STYLE_RULES = {
         "python": {
             "naming": [
-                (r'class\s+[a-z]', "MEDIUM", "Class names should use PascalCase"),
-                (r'def\s+[A-Z]', "MEDIUM", "Function names should use snake_case"),
-                (r'[A-Z]{3,}', "LOW", "Avoid ALL_CAPS except for constants"),
+                (re.compile(r'class\s+[a-z]'), "MEDIUM", "Class names should use PascalCase"),
+                (re.compile(r'def\s+[A-Z]'), "MEDIUM", "Function names should use snake_case"),
+                (re.compile(r'[A-Z]{3,}'), "LOW", "Avoid ALL_CAPS except for constants"),
             ],
             "structure": [
-                (r'^\s{5,}', "LOW", "Deep nesting detected - consider refactoring"),
-                (r'def\s+\w+\(([^)]{50,})\)', "MEDIUM", "Too many parameters - consider using configuration object"),
+                (re.compile(r'^\s{5,}'), "LOW", "Deep nesting detected - consider refactoring"),
+                (re.compile(r'def\s+\w+\(([^)]{50,})\)'), "MEDIUM", "Too many parameters - consider using configuration object"),
             ],
         },
         "javascript": {
             "naming": [
-                (r'function\s+[A-Z]', "MEDIUM", "Function names should use camelCase"),
-                (r'const\s+[A-Z][a-z]', "LOW", "Constants are often ALL_CAPS"),
+                (re.compile(r'function\s+[A-Z]'), "MEDIUM", "Function names should use camelCase"),
+                (re.compile(r'const\s+[A-Z][a-z]'), "LOW", "Constants are often ALL_CAPS"),
             ],
         },
     }
@@ -47,27 +78,20 @@ class StyleAgent(BaseAgent):
         
     def _filter_issues(self, issues: List[CodeReviewIssue]) -> List[CodeReviewIssue]:
         """Filter and prioritize style issues."""
-        # Remove duplicates and minor issues
-        unique_issues = []
-        seen = set()
-        
+        if not issues:
+            return []
+
+        # Remove duplicates and minor issues - the dict dedups while preserving order
+        seen_map = {}
         for issue in issues:
             # Skip very minor issues if we have many
-            if len(unique_issues) > 10 and issue.severity == "LOW":
+            if len(seen_map) > 10 and issue.severity == "LOW":
                 continue
-                
-            key = (issue.line_number, issue.category)
-            if key not in seen:
-                seen.add(key)
-                unique_issues.append(issue)
-        
-        # Sort by severity and line number
-        unique_issues.sort(key=lambda x: (
-            {"HIGH": 0, "MEDIUM": 1, "LOW": 2, "INFO": 3}.get(x.severity, 4),
-            x.line_number
-        ))
-        
-        return unique_issues[:20]  # Limit to top 20 style issues
+            seen_map.setdefault((issue.line_number, issue.category), issue)
+        unique_issues = list(seen_map.values())
+
+        # Top 20 by severity and line; nsmallest avoids sorting the whole list
+        return heapq.nsmallest(20, unique_issues, key=attrgetter("severity_rank", "line_number"))
     
     def _prepare_prompt(
         self,
@@ -78,47 +102,30 @@ class StyleAgent(BaseAgent):
     ) -> str:
         """Prepare style-focused prompt."""
         # Detect language from file extension
-        language = "python" if file_path.endswith(".py") else "javascript" if file_path.endswith(".js") else "general"
-        
-        prompt_parts = [
-            f"As a code style expert, review the following {language} code changes in {file_path}:",
-            "",
-            "Focus on these style aspects:",
-            "1. Naming conventions (variables, functions, classes)",
-            "2. Code organization and structure",
-            "3. Line length and formatting",
-            "4. Comment quality and placement",
-            "5. Consistency with language idioms",
-            "6. DRY (Don't Repeat Yourself) principles",
-            "7. Function and class size",
-            "8. Clear variable and function names",
-            "",
-            f"Apply {language.upper()} style guidelines (PEP 8 for Python, ESLint for JavaScript).",
-            "",
-            "=== CODE DIFF ===",
-            code_diff,
-            ""
-        ]
-        
-        prompt_parts.extend([
-            "Provide your style review in the following JSON format:",
-            json.dumps({
-                "issues": [
-                    {
-                        "line_number": "line where style issue occurs",
-                        "severity": "HIGH for major violations, MEDIUM for standard issues, LOW for suggestions",
-                        "category": "naming|formatting|structure|documentation|consistency|complexity",
-                        "message": "description of the style issue",
-                        "suggestion": "how to improve the style"
-                    }
-                ]
-            }, indent=2),
-            "",
-            "Focus on readability and maintainability. Be constructive in suggestions.",
+        language = _EXT_TO_LANG.get(os.path.splitext(file_path)[1].lower(), "general")
+
+        return (
+            f"As a code style expert, review the following {language} code changes in {file_path}:\n"
+            "\n"
+            "Focus on these style aspects:\n"
+            "1. Naming conventions (variables, functions, classes)\n"
+            "2. Code organization and structure\n"
+            "3. Line length and formatting\n"
+            "4. Comment quality and placement\n"
+            "5. Consistency with language idioms\n"
+            "6. DRY (Don't Repeat Yourself) principles\n"
+            "7. Function and class size\n"
+            "8. Clear variable and function names\n"
+            "\n"
+            f"Apply {language.upper()} style guidelines (PEP 8 for Python, ESLint for JavaScript).\n"
+            "\n"
+            f"=== CODE DIFF ===\n{code_diff}\n\n"
+            "Provide your style review in the following JSON format:\n"
+            f"{_STYLE_SCHEMA_JSON}\n"
+            "\n"
+            "Focus on readability and maintainability. Be constructive in suggestions.\n"
             "Return only valid JSON without any additional text."
-        ])
-        
-        return "\n".join(prompt_parts)
+        )
 
 
 # Test the agent
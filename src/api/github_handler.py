@@ -2,146 +2,220 @@
 GitHub API handler for fetching PR data and posting comments.
 """
 from typing import List, Dict, Any, Optional
-import base64
-from github import Github, GithubException
+import json
+import httpx
 from loguru import logger
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+
+API_URL = "https://api.github.com"
+GRAPHQL_URL = "https://api.github.com/graphql"
 
 
 class GitHubHandler:
-    """Handles GitHub API interactions."""
-    
+    """Handles GitHub API interactions over a shared async HTTP/2 client."""
+
     def __init__(self, token: str):
-        self.github = Github(token)
-        self.executor = ThreadPoolExecutor(max_workers=5)
-    
+        self.token = token
+        # One multiplexed connection pool for all GitHub calls; requests
+        # run as real coroutines instead of thread-pool offloads
+        self._client = httpx.AsyncClient(
+            base_url=API_URL,
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Accept": "application/vnd.github+json",
+                "X-GitHub-Api-Version": "2022-11-28"
+            },
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            timeout=30.0
+        )
+        self._bot_login: Optional[str] = None
+
+    async def close(self):
+        """Release the underlying connection pool."""
+        await self._client.aclose()
+
+    async def _get_json(self, url: str, **kwargs) -> Any:
+        """GET a GitHub endpoint and return the decoded JSON body."""
+        response = await self._client.get(url, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    async def _get_paginated(self, url: str, per_page: int = 100) -> List[Any]:
+        """GET a list endpoint, following pages until a short page."""
+        items: List[Any] = []
+        page = 1
+        while True:
+            batch = await self._get_json(url, params={"per_page": per_page, "page": page})
+            items.extend(batch)
+            if len(batch) < per_page:
+                return items
+            page += 1
+
     async def get_pr_files(self, repo_name: str, pr_number: int) -> List[Dict[str, Any]]:
         """
         Fetch files changed in a pull request.
-        
+
         Returns:
             List of dicts with keys: file_path, diff, content
         """
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            self.executor,
-            self._get_pr_files_sync,
-            repo_name,
-            pr_number
-        )
-    
-    def _get_pr_files_sync(self, repo_name: str, pr_number: int) -> List[Dict[str, Any]]:
-        """Synchronous version of get_pr_files."""
         try:
-            repo = self.github.get_repo(repo_name)
-            pr = repo.get_pull(pr_number)
-            
-            files_data = []
-            
-            for file in pr.get_files():
-                file_data = {
-                    "file_path": file.filename,
-                    "diff": file.patch or "",
-                    "status": file.status,
-                    "additions": file.additions,
-                    "deletions": file.deletions
-                }
-                
-                # Try to get file content for context (if not too large)
-                if file.additions > 0 and file.additions < 500:
-                    try:
-                        # Get the file content from the PR head
-                        content_file = repo.get_contents(
-                            file.filename, 
-                            ref=pr.head.sha
-                        )
-                        if content_file.size < 100000:  # Limit to 100KB
-                            content = base64.b64decode(content_file.content).decode('utf-8')
-                            file_data["content"] = content
-                    except Exception as e:
-                        logger.debug(f"Could not fetch content for {file.filename}: {e}")
-                
-                files_data.append(file_data)
-            
-            logger.info(f"Fetched {len(files_data)} files for PR #{pr_number}")
-            return files_data
-            
-        except GithubException as e:
+            pr, pr_files = await asyncio.gather(
+                self._get_json(f"/repos/{repo_name}/pulls/{pr_number}"),
+                self._get_paginated(f"/repos/{repo_name}/pulls/{pr_number}/files")
+            )
+        except httpx.HTTPError as e:
             logger.error(f"GitHub API error: {e}")
             raise
+
+        head_sha = pr["head"]["sha"]
+        files_data = []
+        eligible = []
+
+        for file in pr_files:
+            file_data = {
+                "file_path": file["filename"],
+                "diff": file.get("patch") or "",
+                "status": file["status"],
+                "additions": file["additions"],
+                "deletions": file["deletions"]
+            }
+            files_data.append(file_data)
+
+            # Try to get file content for context (if not too large)
+            if 0 < file["additions"] < 500:
+                eligible.append((len(files_data) - 1, file["filename"]))
+
+        if eligible:
+            filenames = [filename for _, filename in eligible]
+            try:
+                # One GraphQL round trip fetches every blob at the PR head
+                contents = await self._fetch_contents_graphql(repo_name, head_sha, filenames)
+            except Exception as e:
+                logger.warning(f"GraphQL content fetch failed, falling back to REST: {e}")
+                contents = await asyncio.gather(*[
+                    self._fetch_content(repo_name, filename, head_sha)
+                    for filename in filenames
+                ])
+            for (index, _), content in zip(eligible, contents):
+                if content is not None:
+                    files_data[index]["content"] = content
+
+        logger.info(f"Fetched {len(files_data)} files for PR #{pr_number}")
+        return files_data
+
+    async def _fetch_contents_graphql(
+        self,
+        repo_name: str,
+        head_sha: str,
+        filenames: List[str]
+    ) -> List[Optional[str]]:
+        """Fetch all file blobs at the PR head in a single GraphQL query."""
+        owner, name = repo_name.split("/", 1)
+        aliases = " ".join(
+            'f%d: object(expression: %s) { ... on Blob { text byteSize isBinary } }'
+            % (i, json.dumps(f"{head_sha}:{filename}"))
+            for i, filename in enumerate(filenames)
+        )
+        query = (
+            "query($owner: String!, $name: String!) "
+            "{ repository(owner: $owner, name: $name) { %s } }" % aliases
+        )
+
+        response = await self._client.post(
+            GRAPHQL_URL,
+            json={"query": query, "variables": {"owner": owner, "name": name}}
+        )
+        response.raise_for_status()
+        data = response.json()
+        if data.get("errors"):
+            raise RuntimeError(f"GraphQL errors: {data['errors']}")
+
+        blobs = data["data"]["repository"]
+        contents = []
+        for i in range(len(filenames)):
+            node = blobs.get(f"f{i}")
+            if (node and not node.get("isBinary")
+                    and node.get("text") is not None
+                    and node.get("byteSize", 0) < 100000):  # Limit to 100KB
+                contents.append(node["text"])
+            else:
+                contents.append(None)
+        return contents
+
+    async def _fetch_content(self, repo_name: str, filename: str, ref: str) -> Optional[str]:
+        """Fetch one file's raw content from the PR head, or None if unavailable."""
+        try:
+            response = await self._client.get(
+                f"/repos/{repo_name}/contents/{filename}",
+                params={"ref": ref},
+                headers={"Accept": "application/vnd.github.raw+json"}
+            )
+            response.raise_for_status()
+            raw = response.content
+            if len(raw) >= 100000:  # Limit to 100KB
+                return None
+            if b'\x00' in raw[:512]:  # Binary file - skip UTF-8 decode
+                return None
+            return raw.decode('utf-8', errors='replace')
         except Exception as e:
-            logger.error(f"Error fetching PR files: {e}")
-            raise
-    
+            logger.debug(f"Could not fetch content for {filename}: {e}")
+            return None
+
+    async def _get_bot_login(self) -> str:
+        """Resolve (and cache) the authenticated user's login."""
+        if self._bot_login is None:
+            user = await self._get_json("/user")
+            self._bot_login = user["login"]
+        return self._bot_login
+
     async def post_pr_comment(self, repo_name: str, pr_number: int, comment_body: str):
         """Post a comment on a pull request."""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            self.executor,
-            self._post_pr_comment_sync,
-            repo_name,
-            pr_number,
-            comment_body
-        )
-    
-    def _post_pr_comment_sync(self, repo_name: str, pr_number: int, comment_body: str):
-        """Synchronous version of post_pr_comment."""
         try:
-            repo = self.github.get_repo(repo_name)
-            pr = repo.get_pull(pr_number)
-            
             # Check if we already commented (to avoid spam)
-            bot_login = self.github.get_user().login
-            for comment in pr.get_issue_comments():
-                if comment.user.login == bot_login and "🤖 Code Review Report" in comment.body:
+            bot_login = await self._get_bot_login()
+            comments = await self._get_paginated(
+                f"/repos/{repo_name}/issues/{pr_number}/comments"
+            )
+            for comment in comments:
+                if comment["user"]["login"] == bot_login and "🤖 Code Review Report" in comment["body"]:
                     # Update existing comment
-                    comment.edit(comment_body)
+                    response = await self._client.patch(
+                        f"/repos/{repo_name}/issues/comments/{comment['id']}",
+                        json={"body": comment_body}
+                    )
+                    response.raise_for_status()
                     logger.info(f"Updated existing comment on PR #{pr_number}")
                     return
-            
+
             # Create new comment
-            pr.create_issue_comment(comment_body)
+            response = await self._client.post(
+                f"/repos/{repo_name}/issues/{pr_number}/comments",
+                json={"body": comment_body}
+            )
+            response.raise_for_status()
             logger.info(f"Posted new comment on PR #{pr_number}")
-            
-        except GithubException as e:
+
+        except httpx.HTTPError as e:
             logger.error(f"GitHub API error posting comment: {e}")
             raise
-        except Exception as e:
-            logger.error(f"Error posting PR comment: {e}")
-            raise
-    
+
     async def get_pr_info(self, repo_name: str, pr_number: int) -> Dict[str, Any]:
         """Get basic PR information."""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            self.executor,
-            self._get_pr_info_sync,
-            repo_name,
-            pr_number
-        )
-    
-    def _get_pr_info_sync(self, repo_name: str, pr_number: int) -> Dict[str, Any]:
-        """Synchronous version of get_pr_info."""
         try:
-            repo = self.github.get_repo(repo_name)
-            pr = repo.get_pull(pr_number)
-            
-            return {
-                "number": pr.number,
-                "title": pr.title,
-                "description": pr.body,
-                "author": pr.user.login,
-                "base_branch": pr.base.ref,
-                "head_branch": pr.head.ref,
-                "state": pr.state,
-                "created_at": pr.created_at.isoformat(),
-                "updated_at": pr.updated_at.isoformat()
-            }
-            
-        except GithubException as e:
+            pr = await self._get_json(f"/repos/{repo_name}/pulls/{pr_number}")
+        except httpx.HTTPError as e:
             logger.error(f"GitHub API error: {e}")
             raise
-        except Exception as e:
-            logger.error(f"Error fetching PR info: {e}")
-            raise
\ No newline at end of file
+
+        return {
+            "number": pr["number"],
+            "title": pr["title"],
+            "description": pr["body"],
+            "author": pr["user"]["login"],
+            "base_branch": pr["base"]["ref"],
+            "head_branch": pr["head"]["ref"],
+            "state": pr["state"],
+            "created_at": pr["created_at"],
+            "updated_at": pr["updated_at"]
+        }
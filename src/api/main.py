@@ -2,22 +2,26 @@
 FastAPI application for the Multi-Agent Code Review System.
 """
 from fastapi import FastAPI, HTTPException, Request, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import ValidationError
+import asyncio
 import hmac
 import hashlib
 from typing import Dict, Any, Optional
-import json
+from cachetools import TTLCache
 from loguru import logger
 from datetime import datetime, timezone
 
-from src.core.config import settings
+from src.core.config import settings, ensure_directories
 from src.core.orchestrator import Orchestrator
 from src.api.models import (
-    WebhookPayload, 
-    ReviewRequest, 
+    WebhookPayload,
     ReviewResponse,
-    HealthResponse
+    ReviewStatus,
+    HealthResponse,
+    parse_webhook,
+    parse_review_request
 )
 from src.api.github_handler import GitHubHandler
 
@@ -25,7 +29,8 @@ from src.api.github_handler import GitHubHandler
 app = FastAPI(
     title="Multi-Agent Code Review System",
     description="AI-powered code review system using multiple specialized agents",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -41,20 +46,75 @@ app.add_middleware(
 orchestrator = Orchestrator()
 github_handler = GitHubHandler(settings.github_token)
 
-# In-memory storage for review status (use Redis in production)
-review_status: Dict[str, Dict[str, Any]] = {}
+# In-memory storage for review status (use Redis in production).
+# TTL-bounded so completed reviews are evicted instead of leaking memory.
+review_status: TTLCache = TTLCache(maxsize=10000, ttl=24 * 3600)
+_status_sweep_task: Optional[asyncio.Task] = None
+
+# HMAC prototype with the webhook key's pad state precomputed; each request
+# only pays for a cheap copy() plus the body digest.
+_HMAC_PROTO = (
+    hmac.new(settings.github_webhook_secret.encode(), b"", hashlib.sha256)
+    if settings.github_webhook_secret else None
+)
+
+
+# Debounce window for webhook-triggered reviews: rapid back-to-back pushes
+# reschedule the pending review so only the final push is reviewed.
+_REVIEW_DEBOUNCE_SECONDS = 5.0
+_pending_reviews: Dict[str, asyncio.TimerHandle] = {}
+
+# Completion events for long-polling clients; set when a review finishes.
+# Entries are created when a review is scheduled and evicted when it
+# completes, so the dict only holds in-flight reviews.
+_review_events: Dict[str, asyncio.Event] = {}
+
+# Upper bound on how long a status request may block waiting for completion
+_MAX_WAIT_SECONDS = 30
+
+
+def _schedule_review(review_id: str, repo_name: str, pr_number: int):
+    """(Re)schedule a review to start after a quiet period."""
+    loop = asyncio.get_running_loop()
+    # Register the completion event up front so long-polls arriving
+    # during the debounce window block instead of returning immediately
+    _review_events.setdefault(review_id, asyncio.Event()).clear()
+    pending = _pending_reviews.get(review_id)
+    if pending is not None:
+        pending.cancel()
+
+    def _start():
+        _pending_reviews.pop(review_id, None)
+        asyncio.create_task(_run_review(repo_name, pr_number, review_id))
+
+    _pending_reviews[review_id] = loop.call_later(_REVIEW_DEBOUNCE_SECONDS, _start)
+
+
+async def _sweep_review_status():
+    """Periodically drop expired review status entries."""
+    while True:
+        await asyncio.sleep(3600)
+        expired = review_status.expire()
+        if expired:
+            logger.info("Evicted {count} expired review status entries", count=len(expired))
 
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize resources on startup."""
+    global _status_sweep_task
+    ensure_directories()
     logger.info("Starting Multi-Agent Code Review System...")
     logger.info(f"Agents enabled: {list(orchestrator.agents.keys())}")
+    _status_sweep_task = asyncio.create_task(_sweep_review_status())
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup resources on shutdown."""
+    if _status_sweep_task is not None:
+        _status_sweep_task.cancel()
+    await github_handler.close()
     await orchestrator.shutdown()
     logger.info("Shutting down Multi-Agent Code Review System...")
 
@@ -62,13 +122,13 @@ async def shutdown_event():
 @app.get("/", response_model=HealthResponse)
 async def root():
     """Root endpoint - health check."""
-    return {
-        "status": "healthy",
-        "service": "Multi-Agent Code Review System",
-        "version": "1.0.0",
-        "agents": list(orchestrator.agents.keys()),
-        "timestamp": datetime.now(timezone.utc).isoformat()
-    }
+    return HealthResponse.build(
+        status="healthy",
+        service="Multi-Agent Code Review System",
+        version="1.0.0",
+        agents=list(orchestrator.agents.keys()),
+        timestamp=datetime.now(timezone.utc).isoformat()
+    )
 
 
 @app.get("/health", response_model=HealthResponse)
@@ -76,19 +136,19 @@ async def health_check():
     """Health check endpoint."""
     # Check if all components are working
     agents_status = {name: "active" for name in orchestrator.agents.keys()}
-    
-    return {
-        "status": "healthy",
-        "service": "Multi-Agent Code Review System",
-        "version": "1.0.0",
-        "agents": list(orchestrator.agents.keys()),
-        "agents_status": agents_status,
-        "timestamp": datetime.now(timezone.utc).isoformat()
-    }
+
+    return HealthResponse.build(
+        status="healthy",
+        service="Multi-Agent Code Review System",
+        version="1.0.0",
+        agents=list(orchestrator.agents.keys()),
+        agents_status=agents_status,
+        timestamp=datetime.now(timezone.utc).isoformat()
+    )
 
 
 @app.post("/api/webhook")
-async def github_webhook(request: Request, background_tasks: BackgroundTasks):
+async def github_webhook(request: Request):
     """
     Handle GitHub webhook events.
     
@@ -97,34 +157,41 @@ async def github_webhook(request: Request, background_tasks: BackgroundTasks):
     - A pull request is updated
     - New commits are pushed to a PR
     """
+    # Read the body once: HMAC verification and JSON parsing share the bytes
+    body = await request.body()
+
     # Verify webhook signature
     signature = request.headers.get("X-Hub-Signature-256")
-    if settings.github_webhook_secret and signature:
-        body = await request.body()
-        expected_signature = "sha256=" + hmac.new(
-            settings.github_webhook_secret.encode(),
-            body,
-            hashlib.sha256
-        ).hexdigest()
-        
-        if not hmac.compare_digest(signature, expected_signature):
+    if _HMAC_PROTO is not None and signature:
+        mac = _HMAC_PROTO.copy()
+        mac.update(body)
+        expected_signature = "sha256=" + mac.hexdigest()
+
+        if not hmac.compare_digest(signature.encode(), expected_signature.encode()):
             logger.warning("Invalid webhook signature")
             raise HTTPException(status_code=401, detail="Invalid signature")
-    
-    # Parse webhook payload
-    payload = await request.json()
+
     event_type = request.headers.get("X-GitHub-Event")
-    
+
     logger.info(f"Received GitHub webhook: {event_type}")
-    
-    # Handle pull request events
+
+    # Handle pull request events; the cached TypeAdapter parses and
+    # validates the raw bytes in one step
     if event_type == "pull_request":
-        action = payload.get("action")
-        if action in ["opened", "synchronize", "reopened"]:
-            pr_data = payload["pull_request"]
-            repo_data = payload["repository"]
+        try:
+            payload = parse_webhook(body)
+        except ValidationError:
+            # Signed and well-formed JSON but not a payload shape we
+            # handle - ignore it like the pre-TypeAdapter flow did
+            logger.warning("Ignoring pull_request webhook with unexpected payload shape")
+            return {"status": "ignored", "reason": "Unsupported payload"}
+
+        if (payload.action in ["opened", "synchronize", "reopened"]
+                and payload.pull_request is not None):
+            pr_data = payload.pull_request
+            repo_data = payload.repository
             
-            # Start review in background
+            # Start review in background (debounced across rapid pushes)
             review_id = f"{repo_data['full_name']}/pull/{pr_data['number']}"
             review_status[review_id] = {
                 "status": "pending",
@@ -132,13 +199,8 @@ async def github_webhook(request: Request, background_tasks: BackgroundTasks):
                 "pr_number": pr_data["number"],
                 "repo": repo_data["full_name"]
             }
-            
-            background_tasks.add_task(
-                process_pull_request,
-                pr_data,
-                repo_data,
-                review_id
-            )
+
+            _schedule_review(review_id, repo_data["full_name"], pr_data["number"])
             
             return {
                 "status": "accepted",
@@ -150,12 +212,24 @@ async def github_webhook(request: Request, background_tasks: BackgroundTasks):
 
 
 @app.post("/api/review", response_model=ReviewResponse)
-async def manual_review(review_request: ReviewRequest, background_tasks: BackgroundTasks):
+async def manual_review(request: Request, background_tasks: BackgroundTasks):
     """
     Manually trigger a code review for a pull request.
-    
+
     This endpoint allows manual triggering of reviews without webhooks.
     """
+    # The cached TypeAdapter parses and validates the raw bytes in one
+    # step, skipping FastAPI's generic body-parsing path
+    try:
+        review_request = parse_review_request(await request.body())
+    except ValidationError as e:
+        # include_input=False: malformed bodies arrive as raw bytes,
+        # which the JSON error response could not serialize
+        raise HTTPException(
+            status_code=422,
+            detail=e.errors(include_url=False, include_input=False)
+        )
+
     review_id = f"{review_request.repo}/pull/{review_request.pr_number}"
     
     # Check if review already in progress
@@ -173,103 +247,78 @@ async def manual_review(review_request: ReviewRequest, background_tasks: Backgro
         "repo": review_request.repo
     }
     
+    # Register the completion event before the task starts so status
+    # polls issued right after this response can long-poll on it
+    _review_events.setdefault(review_id, asyncio.Event()).clear()
+
     # Start review in background
     background_tasks.add_task(
-        process_manual_review,
-        review_request,
-        review_id
+        _run_review,
+        review_request.repo,
+        review_request.pr_number,
+        review_id,
+        review_request.post_comment,
+        review_request.include_details
     )
     
-    return {
-        "review_id": review_id,
-        "status": "pending",
-        "message": f"Review started for {review_request.repo} PR #{review_request.pr_number}",
-        "started_at": review_status[review_id]["started_at"]
-    }
+    return ReviewResponse.build(
+        review_id=review_id,
+        status="pending",
+        message=f"Review started for {review_request.repo} PR #{review_request.pr_number}",
+        started_at=review_status[review_id]["started_at"]
+    )
 
 
 @app.get("/api/review/{review_id:path}")
-async def get_review_status(review_id: str):
-    """Get the status of a review."""
+async def get_review_status(review_id: str, wait: int = 0):
+    """Get the status of a review.
+
+    Pass ?wait=N (seconds, capped at 30) to long-poll: the request blocks
+    until the review finishes or the deadline passes, instead of forcing
+    the client to spin on repeated polls.
+    """
     if review_id not in review_status:
         raise HTTPException(status_code=404, detail="Review not found")
-    
-    return review_status[review_id]
 
+    if wait > 0 and review_status[review_id]["status"] in ("pending", "in_progress"):
+        event = _review_events.get(review_id)
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout=min(wait, _MAX_WAIT_SECONDS))
+            except asyncio.TimeoutError:
+                pass
 
-async def process_pull_request(pr_data: Dict, repo_data: Dict, review_id: str):
-    """Process a pull request review (background task)."""
-    try:
-        review_status[review_id]["status"] = "in_progress"
-        
-        # Get PR files
-        files_data = await github_handler.get_pr_files(
-            repo_data["full_name"],
-            pr_data["number"]
-        )
-        
-        # Run orchestrator
-        result = await orchestrator.review_pull_request(
-            pr_number=pr_data["number"],
-            repo_name=repo_data["full_name"],
-            files_data=files_data
-        )
-        
-        # Post comment to GitHub
-        comment_body = result.to_markdown()
-        await github_handler.post_pr_comment(
-            repo_data["full_name"],
-            pr_data["number"],
-            comment_body
-        )
-        
-        # Update status
-        review_status[review_id].update({
-            "status": "completed",
-            "completed_at": datetime.now(timezone.utc).isoformat(),
-            "summary": result.summary,
-            "total_issues": result.total_issues,
-            "critical_issues": result.critical_issues
-        })
-        
-        logger.info(f"Review completed for {review_id}")
-        
-    except Exception as e:
-        logger.error(f"Error processing PR {review_id}: {e}")
-        review_status[review_id].update({
-            "status": "failed",
-            "error": str(e),
-            "completed_at": datetime.now(timezone.utc).isoformat()
-        })
+    # Outbound data comes from trusted internal state - skip validation
+    return ReviewStatus.build(**review_status[review_id])
 
 
-async def process_manual_review(review_request: ReviewRequest, review_id: str):
-    """Process a manual review request (background task)."""
+async def _run_review(
+    repo_name: str,
+    pr_number: int,
+    review_id: str,
+    post_comment: bool = True,
+    include_details: bool = False
+):
+    """Shared review pipeline for webhook and manual triggers (background task)."""
+    event = _review_events.setdefault(review_id, asyncio.Event())
     try:
         review_status[review_id]["status"] = "in_progress"
-        
+
         # Get PR files
-        files_data = await github_handler.get_pr_files(
-            review_request.repo,
-            review_request.pr_number
-        )
-        
+        files_data = await github_handler.get_pr_files(repo_name, pr_number)
+
         # Run orchestrator
         result = await orchestrator.review_pull_request(
-            pr_number=review_request.pr_number,
-            repo_name=review_request.repo,
+            pr_number=pr_number,
+            repo_name=repo_name,
             files_data=files_data
         )
-        
+
         # Post comment if requested
-        if review_request.post_comment:
+        if post_comment:
             comment_body = result.to_markdown()
-            await github_handler.post_pr_comment(
-                review_request.repo,
-                review_request.pr_number,
-                comment_body
-            )
-        
+            await github_handler.post_pr_comment(repo_name, pr_number, comment_body)
+
         # Update status
         review_status[review_id].update({
             "status": "completed",
@@ -277,18 +326,24 @@ async def process_manual_review(review_request: ReviewRequest, review_id: str):
             "summary": result.summary,
             "total_issues": result.total_issues,
             "critical_issues": result.critical_issues,
-            "report": result.to_dict() if review_request.include_details else None
+            "report": result.to_dict() if include_details else None
         })
-        
-        logger.info(f"Manual review completed for {review_id}")
-        
+
+        logger.info(f"Review completed for {review_id}")
+
     except Exception as e:
-        logger.error(f"Error processing manual review {review_id}: {e}")
+        logger.error(f"Error processing review {review_id}: {e}")
         review_status[review_id].update({
             "status": "failed",
             "error": str(e),
             "completed_at": datetime.now(timezone.utc).isoformat()
         })
+    finally:
+        # Wake any long-polling status requests, then drop the entry -
+        # waiters hold their own reference, and later polls see the
+        # final status without waiting
+        event.set()
+        _review_events.pop(review_id, None)
 
 
 if __name__ == "__main__":
@@ -1,7 +1,7 @@
 """
 Pydantic models for API requests and responses.
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 
@@ -29,6 +29,11 @@ class ReviewResponse(BaseModel):
     message: str
     started_at: str
 
+    @classmethod
+    def build(cls, **data) -> "ReviewResponse":
+        """Construct without validation - fields come from trusted internal state."""
+        return cls.model_construct(**data)
+
 
 class HealthResponse(BaseModel):
     """Health check response."""
@@ -39,6 +44,11 @@ class HealthResponse(BaseModel):
     agents_status: Optional[Dict[str, str]] = None
     timestamp: str
 
+    @classmethod
+    def build(cls, **data) -> "HealthResponse":
+        """Construct without validation - fields come from trusted internal state."""
+        return cls.model_construct(**data)
+
 
 class ReviewStatus(BaseModel):
     """Review status details."""
@@ -51,4 +61,25 @@ class ReviewStatus(BaseModel):
     total_issues: Optional[int] = None
     critical_issues: Optional[int] = None
     error: Optional[str] = None
-    report: Optional[Dict[str, Any]] = None
\ No newline at end of file
+    report: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def build(cls, **data) -> "ReviewStatus":
+        """Construct without validation - fields come from trusted internal state."""
+        return cls.model_construct(**data)
+
+
+# Validators built once at import time; validate_json parses and validates
+# raw request bytes in a single step.
+_WEBHOOK_ADAPTER: TypeAdapter = TypeAdapter(WebhookPayload)
+_REVIEW_REQUEST_ADAPTER: TypeAdapter = TypeAdapter(ReviewRequest)
+
+
+def parse_webhook(raw: bytes) -> WebhookPayload:
+    """Validate a raw webhook body without an intermediate json.loads."""
+    return _WEBHOOK_ADAPTER.validate_json(raw)
+
+
+def parse_review_request(raw: bytes) -> ReviewRequest:
+    """Validate a raw manual-review body without an intermediate json.loads."""
+    return _REVIEW_REQUEST_ADAPTER.validate_json(raw)
\ No newline at end of file
@@ -2,6 +2,7 @@
 Configuration management for the Multi-Agent Code Review System.
 """
 import os
+from functools import lru_cache
 from typing import Optional, Dict, Any
 from pathlib import Path
 from pydantic_settings import BaseSettings
@@ -47,6 +48,9 @@ class Settings(BaseSettings):
     enable_performance_agent: bool = Field(True, env="ENABLE_PERFORMANCE_AGENT")
     enable_style_agent: bool = Field(True, env="ENABLE_STYLE_AGENT")
     enable_docs_agent: bool = Field(True, env="ENABLE_DOCS_AGENT")
+    # Combine small diffs into one LLM call per agent instead of one
+    # call per (file, agent) pair
+    enable_batch_reviews: bool = Field(False, env="ENABLE_BATCH_REVIEWS")
     
     # Rate Limiting
     max_requests_per_minute: int = Field(60, env="MAX_REQUESTS_PER_MINUTE")
@@ -56,6 +60,9 @@ class Settings(BaseSettings):
     model_temperature: float = Field(0.1, env="MODEL_TEMPERATURE")
     model_max_tokens: int = Field(2048, env="MODEL_MAX_TOKENS")
     model_timeout: int = Field(30, env="MODEL_TIMEOUT")
+    # Keeps the model (and its warm KV cache) loaded in Ollama between
+    # requests instead of reloading per file
+    model_keep_alive: str = Field("1h", env="MODEL_KEEP_ALIVE")
     
     class Config:
         env_file = ".env"
@@ -65,64 +72,87 @@ class AgentConfig:
     """Configuration for individual agents."""
     
     def __init__(self, name: str, model: str = None, **kwargs):
+        _settings = get_settings()
         self.name = name
-        self.model = model or settings.ollama_model_general
-        self.temperature = kwargs.get("temperature", settings.model_temperature)
-        self.max_tokens = kwargs.get("max_tokens", settings.model_max_tokens)
+        self.model = model or _settings.ollama_model_general
+        self.temperature = kwargs.get("temperature", _settings.model_temperature)
+        self.max_tokens = kwargs.get("max_tokens", _settings.model_max_tokens)
         self.system_prompt = kwargs.get("system_prompt", "")
         self.enabled = kwargs.get("enabled", True)
 
-# Global settings instance
-settings = Settings()
+# Global settings instance, created lazily so importing this module
+# doesn't pay for pydantic-settings validation. Tests can patch by
+# calling get_settings.cache_clear().
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    return Settings()
 
 # Agent configurations
-AGENT_CONFIGS = {
-    "security": AgentConfig(
-        name="Security Agent",
-        model=settings.ollama_model_code,
-        temperature=0.1,
-        system_prompt="""You are a security expert reviewing code for vulnerabilities.
+@lru_cache(maxsize=1)
+def _build_agent_configs() -> Dict[str, AgentConfig]:
+    settings = get_settings()
+    return {
+        "security": AgentConfig(
+            name="Security Agent",
+            model=settings.ollama_model_code,
+            temperature=0.1,
+            system_prompt="""You are a security expert reviewing code for vulnerabilities.
 Focus on: SQL injection, XSS, authentication issues, exposed secrets, OWASP Top 10.
 Provide specific line numbers and severity levels (CRITICAL, HIGH, MEDIUM, LOW)."""
-    ),
-    "performance": AgentConfig(
-        name="Performance Agent",
-        model=settings.ollama_model_code,
-        temperature=0.1,
-        system_prompt="""You are a performance optimization expert reviewing code.
+        ),
+        "performance": AgentConfig(
+            name="Performance Agent",
+            model=settings.ollama_model_code,
+            temperature=0.1,
+            system_prompt="""You are a performance optimization expert reviewing code.
 Focus on: time complexity, memory usage, database queries, caching opportunities.
 Identify O(n²) or worse algorithms, N+1 queries, memory leaks."""
-    ),
-    "style": AgentConfig(
-        name="Style Agent",
-        model=settings.ollama_model_code,
-        temperature=0.1,
-        system_prompt="""You are a code style expert ensuring clean, readable code.
+        ),
+        "style": AgentConfig(
+            name="Style Agent",
+            model=settings.ollama_model_code,
+            temperature=0.1,
+            system_prompt="""You are a code style expert ensuring clean, readable code.
 Focus on: naming conventions, code organization, DRY principles, readability.
 Reference language-specific style guides (PEP8, ESLint, etc.)."""
-    ),
-    "documentation": AgentConfig(
-        name="Documentation Agent",
-        model=settings.ollama_model_general,
-        temperature=0.2,
-        system_prompt="""You are a documentation expert reviewing code documentation.
+        ),
+        "documentation": AgentConfig(
+            name="Documentation Agent",
+            model=settings.ollama_model_general,
+            temperature=0.2,
+            system_prompt="""You are a documentation expert reviewing code documentation.
 Focus on: docstrings, inline comments, README updates, API documentation.
 Ensure complex logic is explained and public APIs are documented."""
-    ),
-}
+        ),
+    }
 
 # Ensure directories exist
 def ensure_directories():
-    """Create necessary directories if they don't exist."""
+    """Create necessary directories if they don't exist.
+
+    Called from the API startup hook and CLI entrypoints rather than at
+    import time, so library/test imports stay side-effect free.
+    """
+    settings = get_settings()
     directories = [
         Path(settings.chroma_persist_directory),
         Path(settings.log_file).parent,
         Path("data/reviews"),
         Path("data/feedback"),
     ]
-    
+
+    if all(directory.is_dir() for directory in directories):
+        return
+
     for directory in directories:
         directory.mkdir(parents=True, exist_ok=True)
 
-# Run on import
-ensure_directories()
\ No newline at end of file
+# PEP 562: keep `from src.core.config import settings` / `AGENT_CONFIGS`
+# working for existing importers while deferring construction until the
+# first access
+def __getattr__(name: str):
+    if name == "settings":
+        return get_settings()
+    if name == "AGENT_CONFIGS":
+        return _build_agent_configs()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
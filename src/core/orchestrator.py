@@ -2,18 +2,44 @@
 Orchestrator - Coordinates multiple agents to perform comprehensive code review.
 """
 import asyncio
-from typing import List, Dict, Any, Optional, Set
+import io
+import time
+from collections import Counter
+from typing import List, Dict, Any, Optional, Set, TypedDict, NotRequired
 from datetime import datetime, timezone
-import json
-from pathlib import Path
 from loguru import logger
 
 from src.agents.base_agent import BaseAgent, CodeReviewIssue
-from src.agents.security_agent import SecurityAgent
-from src.agents.performance_agent import PerformanceAgent
-from src.agents.style_agent import StyleAgent
-from src.agents.documentation_agent import DocumentationAgent
 from src.core.config import settings
+from src.utils.rate_limiter import AsyncRateLimiter
+
+# Severity markers for the markdown report, built once at import
+_SEV_EMOJI = {"CRITICAL": "🔴", "HIGH": "🟠", "MEDIUM": "🟡", "LOW": "🔵", "INFO": "ℹ️"}
+
+# Extensions of reviewable source files (lowercase, no leading dot)
+_SUPPORTED_EXTS = frozenset({
+    "py", "js", "jsx", "ts", "tsx", "java", "cpp", "c",
+    "cs", "go", "rb", "php", "swift", "kt", "rs", "scala"
+})
+
+# Diffs at or below this size are eligible for batched review, where one
+# LLM call per agent covers several files
+_BATCH_DIFF_MAX_CHARS = 2000
+
+
+class FileDiff(TypedDict):
+    """Shape of the per-file payload produced by GitHubHandler.get_pr_files.
+
+    A TypedDict rather than a nested model: the dicts cross the
+    handler/orchestrator boundary as-is, with no per-item validation.
+    """
+
+    file_path: str
+    diff: str
+    content: NotRequired[str]
+    status: NotRequired[str]
+    additions: NotRequired[int]
+    deletions: NotRequired[int]
 
 
 class ReviewResult:
@@ -24,35 +50,50 @@ class ReviewResult:
         self.repo_name = repo_name
         self.start_time = datetime.now(timezone.utc)
         self.end_time: Optional[datetime] = None
+        # ISO strings are cached at set-time; to_dict runs on every
+        # status poll and shouldn't re-format timestamps each call
+        self._start_iso = self.start_time.isoformat()
+        self._end_iso: Optional[str] = None
+        # Monotonic anchor for duration - immune to clock adjustments and
+        # far cheaper than tz-aware datetime arithmetic
+        self._t0 = time.monotonic()
         self.file_results: Dict[str, Dict[str, List[CodeReviewIssue]]] = {}
         self.summary: Dict[str, Any] = {}
         self.total_issues = 0
         self.critical_issues = 0
-        
+        # Tracked incrementally so finalize doesn't rescan every file
+        self._agents_seen: Set[str] = set()
+
     def add_file_result(self, file_path: str, agent_name: str, issues: List[CodeReviewIssue]):
         """Add results from an agent for a specific file."""
         if file_path not in self.file_results:
             self.file_results[file_path] = {}
         
         self.file_results[file_path][agent_name] = issues
+        self._agents_seen.add(agent_name)
         self.total_issues += len(issues)
         self.critical_issues += sum(1 for issue in issues if issue.severity == "CRITICAL")
     
     def finalize(self):
         """Calculate final summary statistics."""
         self.end_time = datetime.now(timezone.utc)
-        self.duration = (self.end_time - self.start_time).total_seconds()
-        
-        # Calculate summary by severity
-        severity_counts = {"CRITICAL": 0, "HIGH": 0, "MEDIUM": 0, "LOW": 0, "INFO": 0}
-        category_counts = {}
-        
-        for file_path, agents_results in self.file_results.items():
-            for agent_name, issues in agents_results.items():
-                for issue in issues:
-                    severity_counts[issue.severity] = severity_counts.get(issue.severity, 0) + 1
-                    category_counts[issue.category] = category_counts.get(issue.category, 0) + 1
+        self._end_iso = self.end_time.isoformat()
+        self.duration = time.monotonic() - self._t0
         
+        # Calculate summary by severity; Counter.update does the
+        # increment loop in C instead of per-issue dict get/set
+        sev = Counter()
+        cat = Counter()
+        for agents_results in self.file_results.values():
+            for issues in agents_results.values():
+                sev.update(issue.severity for issue in issues)
+                cat.update(issue.category for issue in issues)
+
+        # Plain dicts with a fixed severity order, so serializers and
+        # report templates never see a Counter
+        severity_counts = {k: sev.get(k, 0) for k in ("CRITICAL", "HIGH", "MEDIUM", "LOW", "INFO")}
+        category_counts = dict(cat)
+
         self.summary = {
             "total_files": len(self.file_results),
             "total_issues": self.total_issues,
@@ -60,9 +101,7 @@ class ReviewResult:
             "severity_breakdown": severity_counts,
             "category_breakdown": category_counts,
             "duration_seconds": self.duration,
-            "agents_used": list(set(
-                agent for agents in self.file_results.values() for agent in agents.keys()
-            ))
+            "agents_used": sorted(self._agents_seen)
         }
     
     def to_dict(self) -> Dict[str, Any]:
@@ -70,8 +109,8 @@ class ReviewResult:
         return {
             "pr_number": self.pr_number,
             "repo_name": self.repo_name,
-            "start_time": self.start_time.isoformat(),
-            "end_time": self.end_time.isoformat() if self.end_time else None,
+            "start_time": self._start_iso,
+            "end_time": self._end_iso,
             "summary": self.summary,
             "file_results": {
                 file_path: {
@@ -84,91 +123,97 @@ class ReviewResult:
     
     def to_markdown(self) -> str:
         """Generate markdown report for GitHub comment."""
-        lines = [
-            "## 🤖 Code Review Report",
-            "",
-            f"**Repository:** {self.repo_name}",
-            f"**Pull Request:** #{self.pr_number}",
-            f"**Review Duration:** {self.duration:.1f}s",
-            "",
-            "### 📊 Summary",
-            f"- **Total Issues:** {self.total_issues}",
-            f"- **Critical Issues:** {self.critical_issues} 🚨" if self.critical_issues > 0 else "- **Critical Issues:** 0 ✅",
-            f"- **Files Reviewed:** {len(self.file_results)}",
-            ""
-        ]
-        
+        buf = io.StringIO()
+        w = buf.write
+
+        w("## 🤖 Code Review Report\n\n")
+        w(f"**Repository:** {self.repo_name}\n")
+        w(f"**Pull Request:** #{self.pr_number}\n")
+        w(f"**Review Duration:** {self.duration:.1f}s\n\n")
+        w("### 📊 Summary\n")
+        w(f"- **Total Issues:** {self.total_issues}\n")
+        if self.critical_issues > 0:
+            w(f"- **Critical Issues:** {self.critical_issues} 🚨\n")
+        else:
+            w("- **Critical Issues:** 0 ✅\n")
+        w(f"- **Files Reviewed:** {len(self.file_results)}\n\n")
+
         # Severity breakdown
         if self.total_issues > 0:
-            lines.extend([
-                "### 🎯 Issues by Severity",
-                "| Severity | Count | Percentage |",
-                "|----------|-------|------------|"
-            ])
-            
+            w("### 🎯 Issues by Severity\n")
+            w("| Severity | Count | Percentage |\n")
+            w("|----------|-------|------------|\n")
+
             for severity, count in self.summary["severity_breakdown"].items():
                 if count > 0:
                     percentage = (count / self.total_issues) * 100
-                    emoji = {"CRITICAL": "🔴", "HIGH": "🟠", "MEDIUM": "🟡", "LOW": "🔵", "INFO": "ℹ️"}.get(severity, "")
-                    lines.append(f"| {emoji} {severity} | {count} | {percentage:.1f}% |")
-            
-            lines.append("")
-        
-        # File-by-file results
-        lines.extend(["### 📁 Detailed Results", ""])
-        
-        for file_path, agents_results in sorted(self.file_results.items()):
-            all_issues = []
-            for agent_name, issues in agents_results.items():
-                all_issues.extend([(agent_name, issue) for issue in issues])
-            
-            if all_issues:
-                lines.append(f"#### `{file_path}`")
-                lines.append("")
-                
-                # Group by severity for better readability
-                critical_issues = [(a, i) for a, i in all_issues if i.severity == "CRITICAL"]
-                high_issues = [(a, i) for a, i in all_issues if i.severity == "HIGH"]
-                other_issues = [(a, i) for a, i in all_issues if i.severity not in ["CRITICAL", "HIGH"]]
-                
-                # Show critical issues first
-                for agent_name, issue in critical_issues:
-                    lines.append(f"- **Line {issue.line_number}** 🔴 `CRITICAL` ({agent_name}): {issue.message}")
-                    if issue.suggestion:
-                        lines.append(f"  - 💡 {issue.suggestion}")
-                
-                # Then high severity
-                for agent_name, issue in high_issues:
-                    lines.append(f"- **Line {issue.line_number}** 🟠 `HIGH` ({agent_name}): {issue.message}")
-                    if issue.suggestion:
-                        lines.append(f"  - 💡 {issue.suggestion}")
-                
-                # Show a few other issues (collapsed if many)
-                if len(other_issues) > 3:
-                    lines.extend([
-                        "",
-                        "<details>",
-                        f"<summary>Show {len(other_issues)} more issues</summary>",
-                        ""
-                    ])
-                
-                for agent_name, issue in other_issues[:10]:  # Limit to 10
-                    severity_emoji = {"MEDIUM": "🟡", "LOW": "🔵", "INFO": "ℹ️"}.get(issue.severity, "")
-                    lines.append(f"- **Line {issue.line_number}** {severity_emoji} `{issue.severity}` ({agent_name}): {issue.message}")
-                
-                if len(other_issues) > 3:
-                    lines.extend(["", "</details>"])
-                
-                lines.append("")
-        
+                    w(f"| {_SEV_EMOJI.get(severity, '')} {severity} | {count} | {percentage:.1f}% |\n")
+
+            w("\n")
+
+        # File-by-file results; skip the walk entirely on a clean review
+        # and drop zero-issue files before emitting anything
+        if self.total_issues > 0:
+            per_file = []
+            for file_path, agents_results in sorted(self.file_results.items()):
+                all_issues = [
+                    (agent_name, issue)
+                    for agent_name, issues in agents_results.items()
+                    for issue in issues
+                ]
+                if all_issues:
+                    per_file.append((file_path, all_issues))
+        else:
+            per_file = []
+
+        if per_file:
+            w("### 📁 Detailed Results\n\n")
+
+        for file_path, all_issues in per_file:
+            w(f"#### `{file_path}`\n\n")
+
+            # Group by severity for better readability - one pass
+            # over the issues instead of three filtering passes
+            buckets = {"CRITICAL": [], "HIGH": [], "OTHER": []}
+            for agent_name, issue in all_issues:
+                bucket = issue.severity if issue.severity in ("CRITICAL", "HIGH") else "OTHER"
+                buckets[bucket].append((agent_name, issue))
+            critical_issues = buckets["CRITICAL"]
+            high_issues = buckets["HIGH"]
+            other_issues = buckets["OTHER"]
+
+            # Show critical issues first
+            for agent_name, issue in critical_issues:
+                w(f"- **Line {issue.line_number}** 🔴 `CRITICAL` ({agent_name}): {issue.message}\n")
+                if issue.suggestion:
+                    w(f"  - 💡 {issue.suggestion}\n")
+
+            # Then high severity
+            for agent_name, issue in high_issues:
+                w(f"- **Line {issue.line_number}** 🟠 `HIGH` ({agent_name}): {issue.message}\n")
+                if issue.suggestion:
+                    w(f"  - 💡 {issue.suggestion}\n")
+
+            # Show a few other issues (collapsed if many)
+            if len(other_issues) > 3:
+                w("\n<details>\n")
+                w(f"<summary>Show {len(other_issues)} more issues</summary>\n\n")
+
+            for agent_name, issue in other_issues[:10]:  # Limit to 10
+                w(f"- **Line {issue.line_number}** {_SEV_EMOJI.get(issue.severity, '')} "
+                  f"`{issue.severity}` ({agent_name}): {issue.message}\n")
+
+            if len(other_issues) > 3:
+                w("\n</details>\n")
+
+            w("\n")
+
         # Footer
-        lines.extend([
-            "---",
-            "*Generated by Multi-Agent Code Review System*",
-            f"*Agents used: {', '.join(self.summary['agents_used'])}*"
-        ])
-        
-        return "\n".join(lines)
+        w("---\n")
+        w("*Generated by Multi-Agent Code Review System*\n")
+        w(f"*Agents used: {', '.join(self.summary['agents_used'])}*")
+
+        return buf.getvalue()
 
 
 class Orchestrator:
@@ -176,24 +221,53 @@ class Orchestrator:
     
     def __init__(self):
         self.agents: Dict[str, BaseAgent] = {}
+        # Bounds how many files are in flight at once so a large PR
+        # doesn't flood the LLM backend
+        self._file_sem = asyncio.Semaphore(settings.max_concurrent_reviews)
+        # Smooths request bursts to what the LLM backend can serve
+        self._rate_limiter = AsyncRateLimiter(settings.max_requests_per_minute, 60.0)
         self._initialize_agents()
         
     def _initialize_agents(self):
-        """Initialize all enabled agents."""
+        """Initialize all enabled agents.
+
+        Agent modules are imported lazily so disabled agents don't pay
+        their import cost at startup.
+        """
         if settings.enable_security_agent:
+            from src.agents.security_agent import SecurityAgent
             self.agents["Security"] = SecurityAgent()
-            
+
         if settings.enable_performance_agent:
+            from src.agents.performance_agent import PerformanceAgent
             self.agents["Performance"] = PerformanceAgent()
-            
+
         if settings.enable_style_agent:
+            from src.agents.style_agent import StyleAgent
             self.agents["Style"] = StyleAgent()
-            
+
         if settings.enable_docs_agent:
+            from src.agents.documentation_agent import DocumentationAgent
             self.agents["Documentation"] = DocumentationAgent()
-            
+
         logger.info(f"Initialized {len(self.agents)} agents: {list(self.agents.keys())}")
-    
+
+    async def _run_agent(
+        self,
+        agent: BaseAgent,
+        code_diff: str,
+        file_path: str,
+        full_content: Optional[str],
+        context: Optional[Dict[str, Any]]
+    ) -> List[CodeReviewIssue]:
+        """Run one agent under the shared rate limiter.
+
+        Transient-failure retries live in BaseAgent._get_llm_response:
+        review_code swallows exceptions, so they never surface here.
+        """
+        async with self._rate_limiter:
+            return await agent.review_code(code_diff, file_path, full_content, context)
+
     async def review_file(
         self,
         file_path: str,
@@ -201,32 +275,33 @@ class Orchestrator:
         full_content: Optional[str] = None,
         context: Optional[Dict[str, Any]] = None
     ) -> Dict[str, List[CodeReviewIssue]]:
-        """Run all agents on a single file."""
+        """Run all agents on a single file concurrently."""
         results = {}
-        
-        # Run agents concurrently
-        tasks = []
-        for agent_name, agent in self.agents.items():
-            task = agent.review_code(code_diff, file_path, full_content, context)
-            tasks.append((agent_name, task))
-        
-        # Gather results
-        for agent_name, task in tasks:
-            try:
-                issues = await task
-                results[agent_name] = issues
-                logger.info(f"{agent_name} found {len(issues)} issues in {file_path}")
-            except Exception as e:
-                logger.error(f"{agent_name} failed for {file_path}: {e}")
+
+        # Dispatch all agents at once - each call is an independent LLM
+        # round-trip, so latency is max(agent) instead of the serial sum
+        agent_names = list(self.agents.keys())
+        outcomes = await asyncio.gather(
+            *(self._run_agent(self.agents[name], code_diff, file_path, full_content, context)
+              for name in agent_names),
+            return_exceptions=True
+        )
+
+        for agent_name, outcome in zip(agent_names, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"{agent_name} failed for {file_path}: {outcome}")
                 results[agent_name] = []
-        
+            else:
+                results[agent_name] = outcome
+                logger.info(f"{agent_name} found {len(outcome)} issues in {file_path}")
+
         return results
     
     async def review_pull_request(
         self,
         pr_number: int,
         repo_name: str,
-        files_data: List[Dict[str, Any]]
+        files_data: List[FileDiff]
     ) -> ReviewResult:
         """
         Review an entire pull request.
@@ -242,34 +317,66 @@ class Orchestrator:
         logger.info(f"Starting review of PR #{pr_number} in {repo_name} with {len(files_data)} files")
         
         result = ReviewResult(pr_number, repo_name)
-        
-        # Process files with rate limiting
+
+        # Skip non-code files up front
+        eligible = []
         for file_data in files_data:
-            file_path = file_data["file_path"]
-            
-            # Skip non-code files
-            if not self._should_review_file(file_path):
-                logger.debug(f"Skipping non-code file: {file_path}")
-                continue
-            
-            logger.info(f"Reviewing file: {file_path}")
-            
-            # Review the file with all agents
-            file_results = await self.review_file(
-                file_path=file_path,
-                code_diff=file_data.get("diff", ""),
-                full_content=file_data.get("content"),
-                context={"pr_number": pr_number, "repo": repo_name}
+            if self._should_review_file(file_data["file_path"]):
+                eligible.append(file_data)
+            else:
+                logger.debug(f"Skipping non-code file: {file_data['file_path']}")
+
+        # Small diffs can share one LLM call per agent; large files keep
+        # the per-file path so their context isn't crowded out
+        batchable: List[FileDiff] = []
+        if settings.enable_batch_reviews:
+            singles = []
+            for file_data in eligible:
+                if len(file_data.get("diff", "")) <= _BATCH_DIFF_MAX_CHARS:
+                    batchable.append(file_data)
+                else:
+                    singles.append(file_data)
+            eligible = singles
+
+        if batchable:
+            files = [(fd["file_path"], fd.get("diff", "")) for fd in batchable]
+            agent_names = list(self.agents.keys())
+            logger.info(f"Batch-reviewing {len(files)} small files per agent")
+            outcomes = await asyncio.gather(
+                *(self.agents[name].review_code_batch(
+                    files, {"pr_number": pr_number, "repo": repo_name})
+                  for name in agent_names),
+                return_exceptions=True
             )
-            
-            # Add results
+            for agent_name, outcome in zip(agent_names, outcomes):
+                if isinstance(outcome, Exception):
+                    logger.error(f"{agent_name} batch review failed: {outcome}")
+                    continue
+                for (file_path, _), issues in zip(files, outcome):
+                    if issues:
+                        result.add_file_result(file_path, agent_name, issues)
+
+        async def _review_one(file_data: FileDiff):
+            file_path = file_data["file_path"]
+            async with self._file_sem:
+                logger.info(f"Reviewing file: {file_path}")
+                file_results = await self.review_file(
+                    file_path=file_path,
+                    code_diff=file_data.get("diff", ""),
+                    full_content=file_data.get("content"),
+                    context={"pr_number": pr_number, "repo": repo_name}
+                )
+            return file_path, file_results
+
+        # Review files concurrently, bounded by the semaphore, so wall
+        # time tracks the slowest batch rather than the serial sum
+        for file_path, file_results in await asyncio.gather(
+            *(_review_one(file_data) for file_data in eligible)
+        ):
             for agent_name, issues in file_results.items():
                 if issues:
                     result.add_file_result(file_path, agent_name, issues)
-            
-            # Small delay to avoid overwhelming the LLM
-            await asyncio.sleep(0.5)
-        
+
         result.finalize()
         logger.info(f"Review complete. Total issues: {result.total_issues} (Critical: {result.critical_issues})")
         
@@ -277,26 +384,25 @@ class Orchestrator:
     
     def _should_review_file(self, file_path: str) -> bool:
         """Check if file should be reviewed based on extension."""
-        supported_extensions = {
-            ".py", ".js", ".jsx", ".ts", ".tsx", ".java", ".cpp", ".c", 
-            ".cs", ".go", ".rb", ".php", ".swift", ".kt", ".rs", ".scala"
-        }
-        
-        path = Path(file_path)
-        return path.suffix.lower() in supported_extensions
+        _, dot, ext = file_path.rpartition('.')
+        return bool(dot) and ext.lower() in _SUPPORTED_EXTS
     
     async def shutdown(self):
         """Clean up resources."""
-        # Close aiohttp session if needed
-        try:
-            from src.agents.base_agent import close_aiohttp_session
-            await close_aiohttp_session()
-        except:
-            pass
+        # litellm owns its module-level HTTP clients; nothing to close
+        # here today, but the API shutdown hook keeps calling this
+        pass
 
 
 # Example usage
 if __name__ == "__main__":
+    from pathlib import Path
+    import orjson
+
+    from src.core.config import ensure_directories
+
+    ensure_directories()
+
     async def test_orchestrator():
         orchestrator = Orchestrator()
         
@@ -340,8 +446,9 @@ if __name__ == "__main__":
         print(result.to_markdown())
         
         # Save JSON report
-        with open("test_review_report.json", "w") as f:
-            json.dump(result.to_dict(), f, indent=2)
+        Path("test_review_report.json").write_bytes(
+            orjson.dumps(result.to_dict(), option=orjson.OPT_INDENT_2)
+        )
         
         await orchestrator.shutdown()
     
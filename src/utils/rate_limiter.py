@@ -0,0 +1,43 @@
+"""
+Async token-bucket rate limiter for smoothing bursts of LLM requests.
+"""
+import asyncio
+import time
+
+
+class AsyncRateLimiter:
+    """Token-bucket limiter usable as an async context manager.
+
+    Tokens refill continuously at max_rate per period; acquire() waits
+    until a token is available, so callers never exceed the configured
+    request rate even when many coroutines fire at once.
+    """
+
+    def __init__(self, max_rate: int, period: float = 60.0):
+        self.max_rate = max_rate
+        self.period = period
+        self._tokens = float(max_rate)
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available, then consume it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    float(self.max_rate),
+                    self._tokens + (now - self._last_refill) * (self.max_rate / self.period)
+                )
+                self._last_refill = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) * (self.period / self.max_rate))
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return False
@@ -1,18 +1,20 @@
 """
 Test script for the Code Review API
 """
-import requests
-import json
-import time
+import httpx
 from datetime import datetime
 
 # API base URL
 BASE_URL = "http://localhost:8000"
 
+# One pooled client for the whole script: every request reuses the same
+# connection instead of paying a fresh TCP handshake per poll
+client = httpx.Client(base_url=BASE_URL, timeout=30)
+
 def test_health():
     """Test health endpoint"""
     print("1. Testing health endpoint...")
-    response = requests.get(f"{BASE_URL}/health")
+    response = client.get("/health")
     if response.status_code == 200:
         data = response.json()
         print(f"✓ Health check passed!")
@@ -39,10 +41,7 @@ def test_manual_review():
     print(f"   Requesting review for {review_request['repo']} PR #{review_request['pr_number']}")
     
     # Submit review request
-    response = requests.post(
-        f"{BASE_URL}/api/review",
-        json=review_request
-    )
+    response = client.post("/api/review", json=review_request)
     
     if response.status_code == 200:
         data = response.json()
@@ -52,14 +51,19 @@ def test_manual_review():
         print(f"  - Status: {data['status']}")
         print()
         
-        # Poll for results
+        # Long-poll for results: each request blocks server-side for up to
+        # 30s and returns as soon as the review finishes
         print("3. Checking review status...")
-        for i in range(30):  # Check for up to 5 minutes
-            response = requests.get(f"{BASE_URL}/api/review/{review_id}")
+        for i in range(10):  # Check for up to 5 minutes
+            response = client.get(
+                f"/api/review/{review_id}",
+                params={"wait": 30},
+                timeout=60
+            )
             if response.status_code == 200:
                 status_data = response.json()
                 status = status_data['status']
-                
+
                 if status == "completed":
                     print(f"✓ Review completed!")
                     print(f"  - Total issues: {status_data.get('total_issues', 0)}")
@@ -72,8 +76,7 @@ def test_manual_review():
                     print(f"✗ Review failed: {status_data.get('error', 'Unknown error')}")
                     break
                 else:
-                    print(f"  Status: {status} (checking again in 10s...)")
-                    time.sleep(10)
+                    print(f"  Status: {status} (still waiting...)")
             else:
                 print(f"✗ Failed to get status: {response.status_code}")
                 break
@@ -2,35 +2,101 @@
 Test Ollama connection and models
 """
 import asyncio
-import requests
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Optional
+
+import aiohttp
 from litellm import completion, acompletion
 import litellm
 
 # Enable debug mode
 # litellm.set_verbose = True
 
+# Shared session so every probe reuses one keep-alive connection to
+# Ollama instead of a fresh TCP handshake per request
+_session: Optional[aiohttp.ClientSession] = None
+
+def get_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=100, limit_per_host=10),
+            timeout=aiohttp.ClientTimeout(total=60, connect=10)
+        )
+    return _session
+
+async def close_session():
+    if _session is not None and not _session.closed:
+        await _session.close()
+
+# On-disk response cache: the prompts and temperature here never change,
+# so repeat runs can skip the LLM round-trip entirely. Opt in with
+# LLM_CACHE=1 to keep default runs exercising the live server.
+_CACHE_DIR = Path(".cache/ollama")
+
+async def cached_acompletion(**kwargs):
+    if os.getenv("LLM_CACHE") != "1":
+        return await acompletion(**kwargs)
+
+    key_fields = {k: kwargs.get(k) for k in ("model", "messages", "temperature", "max_tokens")}
+    key = hashlib.sha256(
+        json.dumps(key_fields, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    cache_file = _CACHE_DIR / f"{key}.json"
+
+    if cache_file.exists():
+        content = json.loads(cache_file.read_text())
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))]
+        )
+
+    response = await acompletion(**kwargs)
+    _CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    cache_file.write_text(json.dumps(response.choices[0].message.content))
+    return response
+
+# Model list is stable for the life of the Ollama daemon; cache it on
+# disk for 60s so rapid-iteration runs skip the round-trip
+_TAGS_CACHE = Path("/tmp/ollama_tags.json")
+_TAGS_TTL_SECONDS = 60
+
+async def cached_tags() -> dict:
+    if _TAGS_CACHE.exists() and time.time() - _TAGS_CACHE.stat().st_mtime < _TAGS_TTL_SECONDS:
+        return json.loads(_TAGS_CACHE.read_text())
+
+    async with get_session().get("http://localhost:11434/api/tags") as response:
+        models = await response.json()
+    _TAGS_CACHE.write_text(json.dumps(models))
+    return models
+
 async def test_ollama_direct():
     """Test direct Ollama API"""
     print("Testing direct Ollama API...")
-    
+    session = get_session()
+
     # List models
-    response = requests.get("http://localhost:11434/api/tags")
-    models = response.json()
+    models = await cached_tags()
     print(f"Available models: {[m['name'] for m in models['models']]}")
-    
+
     # Test generation
     data = {
         "model": "mistral",
         "prompt": "What is 2+2?",
         "stream": False
     }
-    
-    response = requests.post("http://localhost:11434/api/generate", json=data)
-    if response.status_code == 200:
-        print("✓ Direct Ollama API works!")
-        print(f"Response: {response.json()['response'][:100]}...")
-    else:
-        print(f"✗ Error: {response.status_code} - {response.text}")
+
+    async with session.post("http://localhost:11434/api/generate", json=data) as response:
+        if response.status == 200:
+            result = await response.json()
+            print("✓ Direct Ollama API works!")
+            print(f"Response: {result['response'][:100]}...")
+        else:
+            print(f"✗ Error: {response.status} - {await response.text()}")
 
 async def test_litellm_ollama():
     """Test LiteLLM with Ollama"""
@@ -42,59 +108,100 @@ async def test_litellm_ollama():
         "ollama/mistral:latest",
         "mistral"
     ]
-    
-    for model_name in model_formats:
-        print(f"\nTrying model format: {model_name}")
-        try:
-            response = await acompletion(
-                model=model_name,
-                messages=[{"role": "user", "content": "What is 2+2?"}],
-                api_base="http://localhost:11434",
-                temperature=0.1,
-                max_tokens=50
-            )
+
+    # Probe all formats concurrently and take the first success; the
+    # wall clock is one round-trip instead of the sum of all attempts
+    tasks = {
+        asyncio.create_task(cached_acompletion(
+            model=model_name,
+            messages=[{"role": "user", "content": "What is 2+2?"}],
+            api_base="http://localhost:11434",
+            temperature=0.1,
+            max_tokens=50
+        )): model_name
+        for model_name in model_formats
+    }
+
+    pending = set(tasks)
+    winner = None
+    while pending and winner is None:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            model_name = tasks[task]
+            try:
+                response = task.result()
+            except Exception as e:
+                print(f"✗ Failed with {model_name}: {str(e)}")
+                continue
             print(f"✓ Success with format: {model_name}")
             print(f"Response: {response.choices[0].message.content[:100]}")
-            return model_name  # Return working format
-            
-        except Exception as e:
-            print(f"✗ Failed with {model_name}: {str(e)}")
-    
-    return None
+            winner = model_name
+            break
+
+    for task in pending:
+        task.cancel()
+
+    return winner
+
+# Memoized result of the format probe so test_security_prompt doesn't
+# redo three round-trips that test_litellm_ollama already paid for
+_WORKING_FORMAT: Optional[str] = None
+
+async def _discover_format() -> Optional[str]:
+    global _WORKING_FORMAT
+    if _WORKING_FORMAT is None:
+        _WORKING_FORMAT = await test_litellm_ollama()
+    return _WORKING_FORMAT
+
+# Frozen at module scope so the prompt bytes are identical on every run;
+# the on-disk cache (and any upstream prompt cache) keys on exact bytes.
+# The f-string query in the sample is deliberately vulnerable - it is
+# what the model is asked to find.
+SECURITY_MESSAGES = (
+    {
+        "role": "system",
+        "content": "You are a security expert. Analyze code for vulnerabilities."
+    },
+    {
+        "role": "user",
+        "content": """Review this code:
+
+            def get_user(user_id):
+                query = f"SELECT * FROM users WHERE id = {user_id}"
+                return execute_query(query)
+
+            Identify security issues in JSON format."""
+    },
+)
 
 async def test_security_prompt():
-    """Test with actual security prompt"""
+    """Test with actual security prompt.
+
+    For concurrent prompt batches, run the Ollama server with
+    OLLAMA_NUM_PARALLEL=4 (and OLLAMA_MAX_LOADED_MODELS=2 if mixing
+    models) so requests share one loaded model.
+    """
     print("\nTesting security analysis prompt...")
-    
-    working_format = await test_litellm_ollama()
+
+    working_format = await _discover_format()
     if not working_format:
         print("No working format found!")
         return
-    
-    messages = [
-        {
-            "role": "system", 
-            "content": "You are a security expert. Analyze code for vulnerabilities."
-        },
-        {
-            "role": "user",
-            "content": """Review this code:
-            
-            def get_user(user_id):
-                query = f"SELECT * FROM users WHERE id = {user_id}"
-                return execute_query(query)
-            
-            Identify security issues in JSON format."""
-        }
-    ]
-    
+
+    messages = list(SECURITY_MESSAGES)
+
     try:
-        response = await acompletion(
+        response = await cached_acompletion(
             model=working_format,
             messages=messages,
             api_base="http://localhost:11434",
             temperature=0.1,
-            max_tokens=500
+            # Generation time scales with output tokens: 200 is plenty
+            # for a JSON issue list, and the stop sentinel ends the call
+            # as soon as the model closes a fenced block
+            max_tokens=200,
+            stream=False,
+            stop=["```\n\n"]
         )
         print("✓ Security prompt works!")
         print(f"Response: {response.choices[0].message.content}")
@@ -103,10 +210,18 @@ async def test_security_prompt():
         print(f"✗ Security prompt failed: {str(e)}")
 
 async def main():
-    await test_ollama_direct()
-    working_format = await test_litellm_ollama()
-    if working_format:
-        await test_security_prompt()
+    try:
+        # The direct-API probe and the format discovery are independent;
+        # run them together so wall time is the slower of the two. Only
+        # the security prompt depends on the discovered format.
+        _, working_format = await asyncio.gather(
+            test_ollama_direct(),
+            _discover_format()
+        )
+        if working_format:
+            await test_security_prompt()
+    finally:
+        await close_session()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
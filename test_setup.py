@@ -1,32 +1,54 @@
+import asyncio
 import os
+
+import aiohttp
 from dotenv import load_dotenv
-import requests
 
 load_dotenv()
 
-# Test Ollama
-print("Testing Ollama connection...")
-try:
-    response = requests.get("http://localhost:11434/api/tags")
-    if response.status_code == 200:
-        models = response.json()
-        print("✅ Ollama is running!")
-        print("Available models:", [m['name'] for m in models['models']])
-    else:
-        print("❌ Ollama is not responding")
-except Exception as e:
-    print(f"❌ Error connecting to Ollama: {e}")
-
-# Test GitHub token
-print("\nTesting GitHub token...")
-token = os.getenv("GITHUB_TOKEN")
-if token:
+async def check_ollama(session):
+    """Probe the local Ollama daemon."""
+    try:
+        async with session.get("http://localhost:11434/api/tags") as response:
+            if response.status == 200:
+                models = await response.json()
+                return ["✅ Ollama is running!",
+                        f"Available models: {[m['name'] for m in models['models']]}"]
+            return ["❌ Ollama is not responding"]
+    except Exception as e:
+        return [f"❌ Error connecting to Ollama: {e}"]
+
+async def check_github(session):
+    """Validate the configured GitHub token."""
+    token = os.getenv("GITHUB_TOKEN")
+    if not token:
+        return ["❌ No GitHub token found in .env"]
     headers = {"Authorization": f"token {token}"}
-    response = requests.get("https://api.github.com/user", headers=headers)
-    if response.status_code == 200:
-        user = response.json()
-        print(f"✅ GitHub token valid! Logged in as: {user['login']}")
-    else:
-        print("❌ GitHub token invalid")
-else:
-    print("❌ No GitHub token found in .env")
\ No newline at end of file
+    async with session.get("https://api.github.com/user", headers=headers) as response:
+        if response.status == 200:
+            user = await response.json()
+            return [f"✅ GitHub token valid! Logged in as: {user['login']}"]
+        return ["❌ GitHub token invalid"]
+
+async def main():
+    # One pooled session shared by both probes; they run concurrently so
+    # total wall time is max(ollama, github) rather than the sum
+    async with aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=100, limit_per_host=10),
+        timeout=aiohttp.ClientTimeout(total=60, connect=10)
+    ) as session:
+        ollama_lines, github_lines = await asyncio.gather(
+            check_ollama(session),
+            check_github(session)
+        )
+
+    print("Testing Ollama connection...")
+    for line in ollama_lines:
+        print(line)
+
+    print("\nTesting GitHub token...")
+    for line in github_lines:
+        print(line)
+
+if __name__ == "__main__":
+    asyncio.run(main())